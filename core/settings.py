@@ -34,12 +34,43 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'polls.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
 }
 
+# Bearer tokens issued by /api/v1/token/
+
+AUTH_TOKEN_MAX_AGE = int(os.environ.get('AUTH_TOKEN_MAX_AGE', 24 * 60 * 60))
+
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', 10000))
+
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
+# Per-process cache of the poll ids each user answered, for
+# /polls/active/?unanswered=1.
+COMPLETED_POLLS_CACHE_SIZE = int(os.environ.get('COMPLETED_POLLS_CACHE_SIZE', 10000))
+
+COMPLETED_POLLS_CACHE_TTL = int(os.environ.get('COMPLETED_POLLS_CACHE_TTL', 60))
+
+# Per-process cache of the compiled questions and choices of polls, used to
+# validate submitted answers.
+POLL_SCHEMA_CACHE_SIZE = int(os.environ.get('POLL_SCHEMA_CACHE_SIZE', 1000))
+
+POLL_SCHEMA_CACHE_TTL = int(os.environ.get('POLL_SCHEMA_CACHE_TTL', 60 * 60))
+
+# Per-process ring buffers of the latest submission counts of polls, for
+# /polls/<id>/timeline. Each buffer keeps TIMELINE_BUFFER_SIZE buckets and is
+# reloaded from the database after TIMELINE_BUFFER_TTL seconds.
+TIMELINE_BUFFER_POLLS = int(os.environ.get('TIMELINE_BUFFER_POLLS', 1000))
+
+TIMELINE_BUFFER_SIZE = int(os.environ.get('TIMELINE_BUFFER_SIZE', 120))
+
+TIMELINE_BUFFER_TTL = int(os.environ.get('TIMELINE_BUFFER_TTL', 60))
+
 MIDDLEWARE = [
+    'polls.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +115,67 @@ DATABASES = {
     }
 }
 
+# Read replicas, space separated. Each replica copies the default settings
+# with its own host (SQL_REPLICA_HOSTS) or database name (SQL_REPLICA_DATABASES,
+# e.g. SQLite files).
+
+REPLICA_HOSTS = os.environ.get('SQL_REPLICA_HOSTS', '').split()
+
+REPLICA_NAMES = os.environ.get('SQL_REPLICA_DATABASES', '').split()
+
+REPLICA_DATABASES = []
+
+for i in range(max(len(REPLICA_HOSTS), len(REPLICA_NAMES))):
+    alias = f'replica{i + 1}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        NAME=REPLICA_NAMES[i] if i < len(REPLICA_NAMES) else DATABASES['default']['NAME'],
+        HOST=REPLICA_HOSTS[i] if i < len(REPLICA_HOSTS) else DATABASES['default']['HOST'],
+        TEST={'MIRROR': 'default'},
+    )
+    REPLICA_DATABASES.append(alias)
+
+# Answer databases, space separated like the replicas. Every poll keeps its
+# answers in one of them, chosen from the poll id. Without any the answers
+# stay in the default database. Moving rows after a change of the list is
+# done with `manage.py rebalance_answers`.
+
+ANSWER_SHARD_HOSTS = os.environ.get('SQL_ANSWER_SHARD_HOSTS', '').split()
+
+ANSWER_SHARD_NAMES = os.environ.get('SQL_ANSWER_SHARD_DATABASES', '').split()
+
+ANSWER_DATABASES = []
+
+for i in range(max(len(ANSWER_SHARD_HOSTS), len(ANSWER_SHARD_NAMES))):
+    alias = f'answers{i + 1}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        NAME=ANSWER_SHARD_NAMES[i] if i < len(ANSWER_SHARD_NAMES) else DATABASES['default']['NAME'],
+        HOST=ANSWER_SHARD_HOSTS[i] if i < len(ANSWER_SHARD_HOSTS) else DATABASES['default']['HOST'],
+    )
+    ANSWER_DATABASES.append(alias)
+
+ANSWER_DATABASES = ANSWER_DATABASES or ['default']
+
+DATABASE_ROUTERS = [
+    'polls.db_routers.AnswerShardRouter',
+    'polls.db_routers.PrimaryReplicaRouter',
+]
+
+# Seconds a client keeps reading from the primary after submitting answers.
+REPLICA_PIN_SECONDS = int(os.environ.get('SQL_REPLICA_PIN_SECONDS', 10))
+
+
+# Answer ingestion
+# With the spool enabled, /answer/ stores validated submissions in a local
+# SQLite file and `manage.py drain_answers` writes them to the database.
+
+ANSWER_SPOOL_ENABLED = int(os.environ.get('ANSWER_SPOOL_ENABLED', 0))
+
+ANSWER_SPOOL_PATH = os.environ.get(
+    'ANSWER_SPOOL_PATH', os.path.join(BASE_DIR, 'answers.spool.sqlite3')
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
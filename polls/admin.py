@@ -1,7 +1,236 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.http import HttpResponseRedirect, QueryDict
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
-from .models import Poll, Question, Choice
+from .models import Poll, Question, Choice, PollAnswer, Answer
+from . import sharding
 
-admin.site.register(Poll)
-admin.site.register(Question)
-admin.site.register(Choice)
+
+def estimated_count(queryset):
+    """Row count of the queryset's table from the planner statistics, if any."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        sql = ('SELECT table_rows FROM information_schema.tables '
+               'WHERE table_schema = DATABASE() AND table_name = %s')
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    # Tables that were never analyzed have no estimate.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never counts more than ``count_limit`` rows.
+
+    Unfiltered large tables are counted by the planner's estimate, anything
+    else by a count of at most ``count_limit`` rows, pages beyond that aren't
+    linked.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        return queryset.order_by()[:self.count_limit].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ReadOnlyAdminMixin:
+    # Answers are only stored through ingest, which keeps the tallies.
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class AnswerDatabaseMixin:
+    """Changelist read from the poll's answer database when filtered by poll."""
+    # Parameter with the poll id, and relations to rows that are only in the
+    # default database.
+    poll_lookup = None
+    default_related = ()
+
+    def answer_database(self, request):
+        if not sharding.is_sharded():
+            return None
+        databases = sharding.answer_databases()
+        if len(databases) == 1:
+            return databases[0]
+        try:
+            return sharding.database_for_poll(int(request.GET[self.poll_lookup]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def changelist_view(self, request, extra_context=None):
+        if sharding.is_sharded() and self.answer_database(request) is None:
+            # The default database has none of them, the rows of all polls
+            # can't be listed together.
+            self.message_user(
+                request,
+                f'{self.model._meta.verbose_name_plural.capitalize()} are stored with '
+                f'their poll, open them from the responses of a poll.',
+                messages.WARNING
+            )
+            return HttpResponseRedirect(reverse('admin:polls_poll_changelist'))
+        return super().changelist_view(request, extra_context)
+
+    def lookup_allowed(self, lookup, value):
+        return lookup == self.poll_lookup or super().lookup_allowed(lookup, value)
+
+    def get_list_select_related(self, request):
+        list_select_related = super().get_list_select_related(request)
+        if self.answer_database(request) is None:
+            return list_select_related
+        return tuple(name for name in list_select_related if name not in self.default_related)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        alias = self.answer_database(request)
+        if alias is None:
+            return queryset
+        return queryset.using(alias).prefetch_related(*self.default_related)
+
+
+class PollAnswerFormSet(BaseInlineFormSet):
+    """A page of the submissions of a poll, newest first."""
+    per_page = 20
+    page_param = 'responses'
+    page_number = 1
+    # GET parameters of the change form, kept by the pager links.
+    query = QueryDict()
+
+    @cached_property
+    def page(self):
+        queryset = self.queryset
+        if self.instance.pk is not None:
+            queryset = queryset.using(sharding.database_for_poll(self.instance.pk))
+        paginator = EstimatedCountPaginator(queryset.order_by('-id'), self.per_page)
+        return paginator.get_page(self.page_number)
+
+    def page_query(self, number):
+        query = self.query.copy()
+        query[self.page_param] = number
+        return query.urlencode()
+
+    def previous_page_query(self):
+        return self.page_query(self.page.previous_page_number())
+
+    def next_page_query(self):
+        return self.page_query(self.page.next_page_number())
+
+    def get_queryset(self):
+        return list(self.page.object_list)
+
+
+class PollAnswerInline(ReadOnlyAdminMixin, admin.TabularInline):
+    model = PollAnswer
+    formset = PollAnswerFormSet
+    template = 'admin/polls/poll/responses_inline.html'
+    fields = ('user_id', 'created_at', 'answers')
+    readonly_fields = fields
+    verbose_name_plural = 'responses'
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.page_number = request.GET.get(formset.page_param, 1)
+        formset.query = request.GET
+        return formset
+
+    def answers(self, obj):
+        url = reverse('admin:polls_answer_changelist')
+        return format_html(
+            '<a href="{}?{}={}&amp;poll_answer__id__exact={}">Answers</a>',
+            url, AnswerAdmin.poll_lookup, obj.poll_id, obj.pk
+        )
+
+
+class QuestionInline(admin.TabularInline):
+    model = Question
+    extra = 0
+    show_change_link = True
+
+
+class ChoiceInline(admin.TabularInline):
+    model = Choice
+    extra = 0
+
+
+@admin.register(Poll)
+class PollAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'date_start', 'date_finish', 'version', 'responses')
+    search_fields = ('name',)
+    inlines = (QuestionInline, PollAnswerInline)
+
+    def responses(self, obj):
+        url = reverse('admin:polls_pollanswer_changelist')
+        return format_html(
+            '<a href="{}?{}={}">Responses</a>', url, PollAnswerAdmin.poll_lookup, obj.pk
+        )
+
+    def get_deleted_objects(self, objs, request):
+        to_delete, model_count, perms_needed, protected = super().get_deleted_objects(objs, request)
+        # Answers are view only here, but they still go with their poll.
+        perms_needed -= {model._meta.verbose_name for model in (PollAnswer, Answer)}
+        return to_delete, model_count, perms_needed, protected
+
+
+@admin.register(Question)
+class QuestionAdmin(LargeTableAdmin):
+    list_display = ('id', 'text', 'question_type', 'poll')
+    list_filter = ('question_type',)
+    list_select_related = ('poll',)
+    raw_id_fields = ('poll',)
+    search_fields = ('text',)
+    inlines = (ChoiceInline,)
+
+
+@admin.register(Choice)
+class ChoiceAdmin(LargeTableAdmin):
+    list_display = ('id', 'text', 'question')
+    list_select_related = ('question',)
+    raw_id_fields = ('question',)
+    search_fields = ('text',)
+
+
+@admin.register(PollAnswer)
+class PollAnswerAdmin(ReadOnlyAdminMixin, AnswerDatabaseMixin, LargeTableAdmin):
+    poll_lookup = 'poll__id__exact'
+    default_related = ('poll',)
+    list_display = ('id', 'poll', 'user_id', 'created_at')
+    list_select_related = ('poll',)
+    raw_id_fields = ('poll',)
+    search_fields = ('=user_id',)
+
+
+@admin.register(Answer)
+class AnswerAdmin(ReadOnlyAdminMixin, AnswerDatabaseMixin, LargeTableAdmin):
+    poll_lookup = 'poll_answer__poll__id__exact'
+    default_related = ('question',)
+    list_display = ('id', 'poll_answer', 'question', 'user_id', 'answer')
+    list_select_related = ('poll_answer', 'question')
+    raw_id_fields = ('poll_answer', 'question')
+    search_fields = ('=user_id',)
@@ -0,0 +1,118 @@
+"""Choice answers of a poll as NumPy arrays.
+
+The answers are read once, then every respondent's selections of a question
+are a row of a 0/1 matrix with a column per choice, in choice id order.
+Cross-tabulations and co-selections are products of those matrices.
+"""
+from itertools import chain
+
+import numpy as np
+from django.db.models.functions import Coalesce
+
+from .models import Question, Choice, Answer
+from . import archive, sharding
+
+
+class ChoiceAnswers:
+    def __init__(self, questions, choices, respondents, answered, selections):
+        # {question id: question}, {question id: [choice, ...]}
+        self.questions = questions
+        self.choices = choices
+        # User ids, a row of every array below belongs to one of them.
+        self.respondents = respondents
+        # {question id: bool array}, {question id: uint8 array (respondents, choices)}
+        self.answered = answered
+        self.selections = selections
+
+    def codes(self, question_id):
+        """Index of the chosen choice per respondent, -1 for none."""
+        selections = self.selections[question_id]
+        if not selections.shape[1]:
+            return np.full(len(self.respondents), -1)
+        return np.where(selections.any(axis=1), selections.argmax(axis=1), -1)
+
+    def responses(self, question_id):
+        return int(self.answered[question_id].sum())
+
+    def votes(self, question_id):
+        return self.selections[question_id].sum(axis=0, dtype=np.int64)
+
+    def shares(self, question_id):
+        """Part of the question's respondents that selected each choice."""
+        return self.votes(question_id) / max(self.responses(question_id), 1)
+
+    def crosstab(self, first_id, second_id):
+        """Respondents per pair of choices of the two questions."""
+        first = self.selections[first_id].astype(np.int64)
+        return first.T @ self.selections[second_id]
+
+    def coselection(self, question_id):
+        """Respondents that selected both choices, votes on the diagonal."""
+        return self.crosstab(question_id, question_id)
+
+
+def load(poll, question_ids=None):
+    """Read the choice answers of ``poll``, the stored ones with a single query."""
+    questions = Question.objects.filter(
+        poll=poll, question_type__in=Question.QUESTION_CHOICE_TYPES
+    ).order_by('id')
+    if question_ids is not None:
+        questions = questions.filter(id__in=question_ids)
+    questions = {question.id: question for question in questions}
+    choices = {question_id: [] for question_id in questions}
+    for choice in Choice.objects.filter(question_id__in=list(questions)).order_by('id'):
+        choices[choice.question_id].append(choice)
+
+    rows = Answer.objects.using(sharding.database_for_poll(poll.id)).filter(
+        question_id__in=list(questions)
+    ).annotate(
+        choice=Coalesce('answer_choices__choice_id', 0)
+    ).values_list('user_id', 'question_id', 'choice')
+    if archive.is_finished(poll.date_finish):
+        rows = chain(rows, (
+            (answer.user_id, answer.question_id, choice_id)
+            for answer in archive.answers_of_poll(poll.id) if answer.question_id in questions
+            for choice_id in answer.choice_ids or [0]
+        ))
+    rows = np.array(list(rows), dtype=np.int64).reshape(-1, 3)
+    respondents, respondent = np.unique(rows[:, 0], return_inverse=True)
+
+    answered, selections = {}, {}
+    for question_id, question_choices in choices.items():
+        in_question = rows[:, 1] == question_id
+        answered[question_id] = np.zeros(len(respondents), dtype=bool)
+        answered[question_id][respondent[in_question]] = True
+
+        choice_ids = np.array([choice.id for choice in question_choices], dtype=np.int64)
+        selections[question_id] = np.zeros((len(respondents), len(choice_ids)), dtype=np.uint8)
+        if not len(choice_ids):
+            continue
+        # Rows without a choice, or with one of another question, find no match.
+        column = np.minimum(np.searchsorted(choice_ids, rows[:, 2]), len(choice_ids) - 1)
+        selected = in_question & (choice_ids[column] == rows[:, 2])
+        selections[question_id][respondent[selected], column[selected]] = 1
+    return ChoiceAnswers(questions, choices, respondents, answered, selections)
+
+
+def summary(data):
+    """Votes and shares of every question, and co-selections of multiple choice ones."""
+    report = []
+    for question_id, question in data.questions.items():
+        item = {
+            'id': question_id,
+            'question_type': question.question_type,
+            'text': question.text,
+            'responses': data.responses(question_id),
+            'choices': [
+                {'id': choice.id, 'text': choice.text, 'votes': votes, 'share': share}
+                for choice, votes, share in zip(
+                    data.choices[question_id],
+                    data.votes(question_id).tolist(),
+                    data.shares(question_id).tolist()
+                )
+            ],
+        }
+        if question.question_type == Question.MULTIPLE_CHOICE:
+            item['coselection'] = data.coselection(question_id).tolist()
+        report.append(item)
+    return report
@@ -1,16 +1,58 @@
 from datetime import datetime
 
-from rest_framework import viewsets, permissions, generics
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from rest_framework import viewsets, permissions, generics, status
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .serializers import PollSerializer, QuestionSerializer, \
     ChoiceSerializer, ActivePollSerializer, AnswerSerializer,\
-    PollDoneSerializer, PollAnswerSerializer
-from .models import Poll, Question, Choice, Answer, PollAnswer
+    PollDoneSerializer, PollAnswerSerializer, PollResultsSerializer, \
+    PollBulkSerializer, BulkChoiceSerializer
+from .models import Poll, Question, Choice, Answer, PollAnswer, \
+    batched_version_bumps, bump_poll_version
+from .cache import active_polls, make_etag, etag_matches
+from .spool import get_spool
+from .authentication import issue_token
+from .db_routers import ReplicaReadMixin, pin_to_primary
+from .renderers import CSVRenderer, NDJSONRenderer
+from .metrics import registry
+from . import analytics, export, readpath, sharding, timeline
+from .pagination import KeysetPagination, OptionalKeysetPagination
 
 
-class PollListView(generics.ListCreateAPIView):
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+class ForeignKeyFilterMixin:
+    filter_fields = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for param, field in self.filter_fields.items():
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValidationError({param: 'A valid integer is required.'})
+            queryset = queryset.filter(**{field: value})
+        return queryset
+
+
+class PollListView(ReplicaReadMixin, generics.ListCreateAPIView):
     queryset = Poll.objects.all()
     serializer_class = PollSerializer
     permission_classes = (permissions.IsAdminUser,)
+    pagination_class = OptionalKeysetPagination
 
 
 class PollDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -18,17 +60,184 @@ class PollDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PollSerializer
     permission_classes = (permissions.IsAdminUser,)
 
+    def retrieve(self, request, *args, **kwargs):
+        poll = self.get_object()
+        etag = make_etag(poll.pk, poll.version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = Response(self.get_serializer(poll).data)
+        response['ETag'] = etag
+        return response
+
+
+class PollBulkCreateView(generics.CreateAPIView):
+    queryset = Poll.objects.all()
+    serializer_class = PollBulkSerializer
+    permission_classes = (permissions.IsAdminUser,)
+
+
+class PollResultsView(generics.RetrieveAPIView):
+    queryset = Poll.objects.prefetch_related(
+        Prefetch(
+            'questions',
+            queryset=Question.objects.select_related('tally').order_by('id')
+        ),
+        Prefetch(
+            'questions__choices',
+            queryset=Choice.objects.select_related('tally').order_by('id')
+        ),
+    )
+    serializer_class = PollResultsSerializer
+    permission_classes = (permissions.IsAdminUser,)
+
+
+class PollCrosstabView(generics.RetrieveAPIView):
+    queryset = Poll.objects.all()
+    permission_classes = (permissions.IsAdminUser,)
+
+    def retrieve(self, request, *args, **kwargs):
+        poll = self.get_object()
+        question_ids = []
+        for param in ('q1', 'q2'):
+            try:
+                question_ids.append(int(request.query_params[param]))
+            except (KeyError, ValueError):
+                raise ValidationError({param: 'A valid integer is required.'})
+        data = analytics.load(poll, question_ids)
+        for param, question_id in zip(('q1', 'q2'), question_ids):
+            if question_id not in data.questions:
+                raise ValidationError(
+                    {param: 'Question must be a choice question of the poll.'}
+                )
+        first, second = question_ids
+        return Response({
+            'poll': poll.id,
+            'respondents': len(data.respondents),
+            'q1': self.describe(data, first),
+            'q2': self.describe(data, second),
+            'counts': data.crosstab(first, second).tolist(),
+        })
+
+    def describe(self, data, question_id):
+        question = data.questions[question_id]
+        return {
+            'id': question.id,
+            'question_type': question.question_type,
+            'text': question.text,
+            'choices': [
+                {'id': choice.id, 'text': choice.text}
+                for choice in data.choices[question_id]
+            ],
+        }
+
+
+class PollTimelineView(generics.RetrieveAPIView):
+    queryset = Poll.objects.all()
+    permission_classes = (permissions.IsAdminUser,)
+    max_limit = 1000
+
+    def retrieve(self, request, *args, **kwargs):
+        poll = self.get_object()
+        bucket = request.query_params.get('bucket', 'hour')
+        if bucket not in timeline.BUCKETS:
+            raise ValidationError(
+                {'bucket': f'Must be one of: {", ".join(timeline.BUCKETS)}.'}
+            )
+        try:
+            limit = int(request.query_params.get('limit', 60))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_limit:
+            raise ValidationError(
+                {'limit': f'Must be an integer from 1 to {self.max_limit}.'}
+            )
+        return Response({
+            'poll': poll.id,
+            'bucket': bucket,
+            'series': [
+                {'start': start, 'count': count}
+                for start, count in timeline.series(poll.id, bucket, limit)
+            ],
+        })
+
+
+class PollExportView(generics.RetrieveAPIView):
+    queryset = Poll.objects.all()
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (CSVRenderer, NDJSONRenderer)
+
+    def retrieve(self, request, *args, **kwargs):
+        poll = self.get_object()
+        export_format = request.accepted_renderer.format
+        content_type, lines = export.FORMATS[export_format]
+        response = StreamingHttpResponse(lines(poll), content_type=content_type)
+        response['Content-Disposition'] = \
+            f'attachment; filename="poll-{poll.id}.{export_format}"'
+        return response
 
-class ActivePollListView(generics.ListAPIView):
-    queryset = Poll.objects.filter(date_finish__gte=datetime.now().date())
+
+class ActivePollListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ActivePollSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    # Build the payload from values() rows instead of the serializers.
+    values_read_path = True
 
+    def get_queryset(self):
+        return Poll.objects.filter(
+            date_finish__gte=datetime.now().date()
+        ).order_by('id').prefetch_related(
+            Prefetch('questions', queryset=Question.objects.order_by('id')),
+            Prefetch('questions__choices', queryset=Choice.objects.order_by('id')),
+        )
 
-class QuestionListView(generics.ListCreateAPIView):
-    queryset = Question.objects.all()
+    def list(self, request, *args, **kwargs):
+        # The payload is the same for every respondent. Its ETag comes from
+        # the versions of the active polls alone, and the rendered payload is
+        # kept until the ETag changes. With ?unanswered=1 the polls the user
+        # answered are left out of both.
+        today = datetime.now().date()
+        versions = Poll.objects.filter(date_finish__gte=today).order_by('id')
+        versions = list(versions.values_list('id', 'version'))
+        snapshot = etag = make_etag(today, versions)
+        unanswered = None
+        if request.query_params.get('unanswered') in ('1', 'true'):
+            unanswered = self.unanswered_poll_ids(today, versions)
+            etag = make_etag(etag, unanswered)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        data = active_polls.get(snapshot, self.render_payload)
+        if unanswered is not None:
+            unanswered = set(unanswered)
+            data = [poll for poll in data if poll['id'] in unanswered]
+        response = Response(data)
+        response['ETag'] = etag
+        return response
+
+    def unanswered_poll_ids(self, today, versions):
+        user_id = self.request.user.id
+        if sharding.is_sharded():
+            # Answers on other databases can't be joined.
+            completed = readpath.completed_poll_ids(user_id)
+            return [pk for pk, _ in versions if pk not in completed]
+        # NOT EXISTS on the (user_id, poll) index of PollAnswer.
+        return list(Poll.objects.filter(date_finish__gte=today).annotate(
+            unanswered=~Exists(PollAnswer.objects.filter(poll=OuterRef('pk'), user_id=user_id))
+        ).filter(unanswered=True).order_by('id').values_list('id', flat=True))
+
+    def render_payload(self):
+        if self.values_read_path:
+            return readpath.active_polls(self.get_queryset())
+        return self.get_serializer(self.get_queryset(), many=True).data
+
+
+class QuestionListView(ReplicaReadMixin, ForeignKeyFilterMixin, generics.ListCreateAPIView):
+    queryset = Question.objects.prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
     serializer_class = QuestionSerializer
     permission_classes = (permissions.IsAdminUser,)
+    pagination_class = OptionalKeysetPagination
+    filter_fields = {'poll': 'poll_id'}
 
 
 class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -37,10 +246,44 @@ class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAdminUser,)
 
 
-class ChoiceListView(generics.ListCreateAPIView):
+class QuestionChoicesView(generics.GenericAPIView):
+    queryset = Question.objects.all()
+    serializer_class = BulkChoiceSerializer
+    permission_classes = (permissions.IsAdminUser,)
+
+    def put(self, request, *args, **kwargs):
+        question = self.get_object()
+        if question.question_type not in Question.QUESTION_CHOICE_TYPES:
+            raise ValidationError(
+                {'question': "Question must have 'choice' or 'multiple choice' type, not 'text'."}
+            )
+        # Deleting the choices would take their votes along.
+        if Answer.objects.using(sharding.database_for_poll(question.poll_id)).filter(
+                question_id=question.id).exists():
+            return Response(
+                {'question': 'Question has already been answered.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic(), batched_version_bumps():
+            question.choices.all().delete()
+            Choice.objects.bulk_create([
+                Choice(question=question, text=data['text'])
+                for data in serializer.validated_data
+            ])
+            bump_poll_version(pk=question.poll_id)
+        active_polls.invalidate()
+        choices = question.choices.order_by('id')
+        return Response(self.get_serializer(choices, many=True).data)
+
+
+class ChoiceListView(ReplicaReadMixin, ForeignKeyFilterMixin, generics.ListCreateAPIView):
     queryset = Choice.objects.all()
     serializer_class = ChoiceSerializer
     permission_classes = (permissions.IsAdminUser,)
+    pagination_class = OptionalKeysetPagination
+    filter_fields = {'question': 'question_id'}
 
 
 class ChoiceDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -54,12 +297,106 @@ class AnswerCreateView(generics.CreateAPIView):
     serializer_class = PollAnswerSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    def create(self, request, *args, **kwargs):
+        # Retried submissions are rejected before the answers are validated,
+        # the unique constraint covers the ones that race past this check.
+        try:
+            poll_id = int(request.data.get('poll'))
+        except (AttributeError, TypeError, ValueError):
+            poll_id = None
+        if poll_id is not None and PollAnswer.objects.using(
+                sharding.database_for_poll(poll_id)).filter(
+                poll_id=poll_id, user_id=request.user.id).exists():
+            return self.conflict()
+        if settings.ANSWER_SPOOL_ENABLED:
+            return self.enqueue(request)
+        try:
+            response = super().create(request, *args, **kwargs)
+        except IntegrityError:
+            return self.conflict()
+        pin_to_primary(response, request.user.id)
+        return response
 
-class PollDoneListView(generics.ListAPIView):
+    def enqueue(self, request):
+        # Written to the database later by ``manage.py drain_answers``.
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        get_spool().append(serializer.get_submission(serializer.validated_data))
+        return Response(
+            {'poll': serializer.validated_data['poll'].id},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    def conflict(self):
+        return Response(
+            {'poll': 'Poll has already been answered.'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+
+class DonePollPagination(KeysetPagination):
+    # A user answers a poll once, and poll ids are the same on every answer
+    # database, unlike the ids of the answers.
+    ordering = 'poll_id'
+
+
+class PollDoneListView(ReplicaReadMixin, generics.ListAPIView):
     queryset = PollAnswer.objects.all()
     serializer_class = PollDoneSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = DonePollPagination
+    # Build the payload from values() rows instead of the serializers.
+    values_read_path = True
 
     def get_queryset(self):
         user = self.request.user
-        return PollAnswer.objects.filter(user_id=user.id)
+        queryset = PollAnswer.objects.filter(user_id=user.id)
+        if sharding.is_sharded():
+            # Polls and questions aren't in the answer databases to join.
+            queryset = queryset.prefetch_related(
+                'poll',
+                Prefetch('answers', queryset=Answer.objects.order_by('id')),
+                'answers__question',
+            )
+        else:
+            queryset = queryset.select_related('poll').prefetch_related(
+                Prefetch(
+                    'answers',
+                    queryset=Answer.objects.select_related('question').order_by('id')
+                )
+            )
+        return sharding.fan_out(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if not self.values_read_path:
+            return super().list(request, *args, **kwargs)
+        rows = sharding.fan_out(PollAnswer.objects.filter(
+            user_id=request.user.id
+        ).order_by('poll_id').values(*readpath.done_poll_fields()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(readpath.done_polls(list(rows)))
+        return self.get_paginated_response(readpath.done_polls(page))
+
+
+class TokenObtainView(generics.GenericAPIView):
+    serializer_class = AuthTokenSerializer
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({
+            'token': issue_token(serializer.validated_data['user']),
+            'expires_in': settings.AUTH_TOKEN_MAX_AGE,
+        })
+
+
+class MetricsView(APIView):
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,131 @@
+"""Compressed archive of the answers of finished polls.
+
+``manage.py archive_polls`` moves the answers of polls that finished a while
+ago out of the ``Answer`` and ``AnswerChoice`` tables into ``AnswerArchive``
+blocks on the poll's answer database. A block holds the answers of a range of
+users as zlib-compressed JSON columns, with the counts they add to the poll's
+tallies. ``PollAnswer`` rows are kept, the answers are read back through them.
+"""
+import json
+import zlib
+from collections import Counter, namedtuple
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Answer, AnswerChoice, AnswerArchive
+from . import sharding
+
+ArchivedAnswer = namedtuple('ArchivedAnswer', ['user_id', 'question_id', 'answer', 'choice_ids'])
+
+BATCH_SIZE = 1000
+
+
+def is_finished(date_finish):
+    """Only polls that finished before today can have archived answers."""
+    return date_finish < datetime.now().date()
+
+
+def pack(answers):
+    columns = {
+        field: [getattr(answer, field) for answer in answers]
+        for field in ArchivedAnswer._fields
+    }
+    return zlib.compress(json.dumps(columns, separators=(',', ':')).encode())
+
+
+def unpack(data):
+    columns = json.loads(zlib.decompress(bytes(data)))
+    return [
+        ArchivedAnswer(*row)
+        for row in zip(*(columns[field] for field in ArchivedAnswer._fields))
+    ]
+
+
+def archive_poll(poll_id, batch_size=BATCH_SIZE):
+    """Move the stored answers of a poll into blocks of ``batch_size`` users.
+
+    Returns the number of archived submissions. A block is written in the
+    transaction that deletes its answers, so a run that stops halfway leaves
+    the rest for the next one.
+    """
+    alias = sharding.database_for_poll(poll_id)
+    answers = Answer.objects.using(alias).filter(poll_answer__poll_id=poll_id)
+    archived = 0
+    while True:
+        user_ids = list(
+            answers.order_by('user_id').values_list('user_id', flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            return archived
+        with transaction.atomic(using=alias):
+            _archive_users(alias, poll_id, user_ids)
+        archived += len(user_ids)
+
+
+def _archive_users(alias, poll_id, user_ids):
+    answers = Answer.objects.using(alias).filter(
+        poll_answer__poll_id=poll_id, user_id__in=user_ids
+    )
+    answer_choices = AnswerChoice.objects.using(alias).filter(
+        answer__poll_answer__poll_id=poll_id, answer__user_id__in=user_ids
+    )
+    choice_ids = {}
+    for answer_id, choice_id in answer_choices.order_by('id').values_list('answer_id', 'choice_id'):
+        choice_ids.setdefault(answer_id, []).append(choice_id)
+    rows = [
+        ArchivedAnswer(user_id, question_id, answer, choice_ids.get(pk, []))
+        for pk, user_id, question_id, answer in answers.order_by('user_id', 'id').values_list(
+            'id', 'user_id', 'question_id', 'answer'
+        )
+    ]
+    tallies = {
+        'responses': Counter(row.question_id for row in rows),
+        'votes': Counter(choice_id for row in rows for choice_id in row.choice_ids),
+    }
+    AnswerArchive.objects.using(alias).create(
+        poll_id=poll_id, first_user_id=user_ids[0], last_user_id=user_ids[-1],
+        submissions=len(user_ids), tallies=json.dumps(tallies), data=pack(rows)
+    )
+    answer_choices.delete()
+    answers.delete()
+
+
+def answers_of(alias, pairs):
+    """Archived answers of (poll id, user id) pairs stored on ``alias``, by pair."""
+    if not pairs:
+        return {}
+    lookup = Q()
+    for poll_id, user_id in pairs:
+        lookup |= Q(poll_id=poll_id, first_user_id__lte=user_id, last_user_id__gte=user_id)
+    wanted = set(pairs)
+    found = {}
+    blocks = sharding.on_database(AnswerArchive.objects, alias).filter(lookup)
+    for poll_id, data in blocks.order_by('id').values_list('poll_id', 'data'):
+        for answer in unpack(data):
+            if (poll_id, answer.user_id) in wanted:
+                found.setdefault((poll_id, answer.user_id), []).append(answer)
+    return found
+
+
+def answers_of_poll(poll_id):
+    """Archived answers of a poll, by user, one block in memory at a time."""
+    blocks = AnswerArchive.objects.using(sharding.database_for_poll(poll_id)).filter(
+        poll_id=poll_id
+    ).order_by('first_user_id', 'id')
+    for data in blocks.values_list('data', flat=True).iterator(chunk_size=1):
+        yield from unpack(data)
+
+
+def tallies(alias, poll_id=None):
+    """Responses and votes of the archived answers on ``alias``, by id."""
+    responses, votes = Counter(), Counter()
+    blocks = AnswerArchive.objects.using(alias)
+    if poll_id is not None:
+        blocks = blocks.filter(poll_id=poll_id)
+    for counts in blocks.values_list('tallies', flat=True).iterator():
+        counts = json.loads(counts)
+        responses.update({int(pk): amount for pk, amount in counts['responses'].items()})
+        votes.update({int(pk): amount for pk, amount in counts['votes'].items()})
+    return responses, votes
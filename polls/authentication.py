@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import baseconv
+from django.utils.crypto import salted_hmac
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .cache import ExpiringLRU
+
+SALT = 'polls.authentication.token'
+
+user_cache = ExpiringLRU(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+# Tokens of these users issued before the given time are rejected by this
+# process, see revoke_tokens().
+_revoked = {}
+
+
+def credentials_stamp(user):
+    # Changes with the password hash, so a new password invalidates every
+    # token issued with the old one once the cached user expires.
+    return salted_hmac(SALT, user.password).hexdigest()[:16]
+
+
+def issue_token(user):
+    return signing.TimestampSigner(salt=SALT).sign(f'{user.pk}:{credentials_stamp(user)}')
+
+
+def revoke_tokens(user_id):
+    """Reject the user's current tokens in this process and drop the cached user."""
+    _revoked[user_id] = time.time()
+    user_cache.evict(user_id)
+
+
+def clear_revocations():
+    _revoked.clear()
+
+
+def get_token_user(token):
+    signer = signing.TimestampSigner(salt=SALT)
+    try:
+        value = signer.unsign(token, max_age=settings.AUTH_TOKEN_MAX_AGE)
+        user_id, stamp = value.split(':')
+        user_id = int(user_id)
+    except (signing.BadSignature, ValueError):
+        raise AuthenticationFailed('Invalid or expired token.')
+    revoked = _revoked.get(user_id)
+    if revoked is not None and baseconv.base62.decode(token.rsplit(':', 2)[1]) <= revoked:
+        raise AuthenticationFailed('Invalid or expired token.')
+
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = get_user_model()._default_manager.get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed('Invalid or expired token.')
+        user_cache.set(user_id, user)
+    if not user.is_active or credentials_stamp(user) != stamp:
+        raise AuthenticationFailed('Invalid or expired token.')
+    return user
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Stateless ``Authorization: Bearer <token>`` authentication.
+
+    Tokens are HMAC signed and timestamped, so checking one costs neither a
+    password hash nor, while the user is cached, a database read.
+    """
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Invalid token header.')
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed('Invalid token header.')
+        return get_token_user(token), None
+
+    def authenticate_header(self, request):
+        return 'Bearer'
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
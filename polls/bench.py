@@ -0,0 +1,139 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test.utils import override_settings
+
+from . import ingest, tallies
+from .models import Poll, Question, Choice
+
+
+@contextmanager
+def scratch_database(alias='default'):
+    """Run the block against a freshly migrated throwaway database.
+
+    Answer databases, replicas and the spool are switched off meanwhile, so
+    nothing but the scratch database is read or written.
+    """
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(
+                ANSWER_DATABASES=[alias], REPLICA_DATABASES=[], ANSWER_SPOOL_ENABLED=0):
+            yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, point):
+    ordered = sorted(samples)
+    index = max(math.ceil(point / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        f'p{point}_ms': round(percentile(samples, point) * 1000, 3)
+        for point in (50, 95, 99)
+    }
+
+
+class QueryRecorder:
+    """Counts and times queries, install with ``connection.execute_wrapper``."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - start
+
+
+def random_answer(question, choices, rng):
+    if question.question_type == Question.TEXT or not choices:
+        return ingest.SubmittedAnswer(question.id, f'Answer {rng.random()}', [])
+    if question.question_type == Question.CHOICE:
+        selected = [rng.choice(choices)]
+    else:
+        selected = rng.sample(choices, rng.randint(1, len(choices)))
+    return ingest.SubmittedAnswer(
+        question.id, ';'.join(choice.text for choice in selected),
+        [choice.id for choice in selected]
+    )
+
+
+def seed_dataset(polls, questions, choices, users, spare_users=0, rng=None):
+    """Create active polls answered by ``users`` users.
+
+    Question types rotate through text, choice and multiple choice.
+    ``spare_users`` more users are created that haven't answered anything.
+    """
+    rng = rng or random.Random(0)
+    today = datetime.now().date()
+    types = [question_type for question_type, _ in Question.QUESTION_TYPES]
+    with transaction.atomic():
+        Poll.objects.bulk_create([
+            Poll(name=f'Poll {i}', description=f'Description of poll {i}',
+                 date_start=today, date_finish=today + timedelta(days=30))
+            for i in range(polls)
+        ])
+        poll_objects = list(Poll.objects.order_by('id'))
+        Question.objects.bulk_create([
+            Question(poll=poll, text=f'Question {i}', question_type=types[i % len(types)])
+            for poll in poll_objects
+            for i in range(questions)
+        ])
+        question_objects = list(Question.objects.order_by('id'))
+        Choice.objects.bulk_create([
+            Choice(question=question, text=f'Choice {i}')
+            for question in question_objects
+            if question.question_type in Question.QUESTION_CHOICE_TYPES
+            for i in range(choices)
+        ])
+        choice_objects = {}
+        for choice in Choice.objects.order_by('id'):
+            choice_objects.setdefault(choice.question_id, []).append(choice)
+
+        User.objects.bulk_create([
+            User(username=f'user{i}') for i in range(users + spare_users)
+        ])
+        user_objects = list(User.objects.order_by('id'))
+        respondents, spare = user_objects[:users], user_objects[users:]
+        for poll in poll_objects:
+            poll_questions = [q for q in question_objects if q.poll_id == poll.id]
+            ingest.write([
+                ingest.Submission(poll.id, user.id, [
+                    random_answer(question, choice_objects.get(question.id, []), rng)
+                    for question in poll_questions
+                ])
+                for user in respondents
+            ])
+        admin = User.objects.create_superuser('admin', 'admin@example.com', None)
+    tallies.rebuild()
+    return {
+        'admin': admin,
+        'respondent': respondents[0] if respondents else admin,
+        'fresh': spare,
+        'polls': poll_objects,
+        'questions': question_objects,
+        'choices': choice_objects,
+    }
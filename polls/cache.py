@@ -0,0 +1,111 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.http import parse_etags, quote_etag
+
+
+class Snapshot:
+    """Process-local value cached for a single key.
+
+    ``invalidate`` may run while a value is being built, so a value is only
+    stored if no invalidation happened in the meantime.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._key = None
+        self._value = None
+        self._valid = False
+
+    def get(self, key, build):
+        with self._lock:
+            if self._valid and self._key == key:
+                return self._value
+            generation = self._generation
+        value = build()
+        with self._lock:
+            if generation == self._generation:
+                self._key = key
+                self._value = value
+                self._valid = True
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._valid = False
+            self._key = None
+            self._value = None
+
+
+active_polls = Snapshot()
+
+
+class ExpiringLRU:
+    """Thread-safe LRU whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Ids of the polls each user answered, see readpath.completed_poll_ids().
+completed_polls = ExpiringLRU(
+    settings.COMPLETED_POLLS_CACHE_SIZE, settings.COMPLETED_POLLS_CACHE_TTL
+)
+
+
+# Compiled schemas of polls by poll id, see polls.schema.
+poll_schemas = ExpiringLRU(settings.POLL_SCHEMA_CACHE_SIZE, settings.POLL_SCHEMA_CACHE_TTL)
+
+
+# Submission counters by (poll id, bucket), one per bucket kind of a poll,
+# see polls.timeline.
+poll_timelines = ExpiringLRU(
+    settings.TIMELINE_BUFFER_POLLS * 3, settings.TIMELINE_BUFFER_TTL
+)
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
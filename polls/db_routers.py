@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from . import sharding
+
+PIN_COOKIE = 'polls_primary'
+
+_state = threading.local()
+_pinned_users = {}
+_pins_lock = threading.Lock()
+
+
+def start_replica_reads():
+    _state.replica = True
+
+
+def stop_replica_reads():
+    _state.replica = False
+
+
+def pin_to_primary(response, user_id):
+    """Send the user's reads to the primary until replicas caught up.
+
+    The cookie covers browsers, the in-process entry covers clients that
+    don't keep cookies and come back to the same worker.
+    """
+    response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS)
+    with _pins_lock:
+        _pinned_users[user_id] = time.monotonic() + settings.REPLICA_PIN_SECONDS
+
+
+def clear_pins():
+    with _pins_lock:
+        _pinned_users.clear()
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    user_id = getattr(request.user, 'id', None)
+    with _pins_lock:
+        expires = _pinned_users.get(user_id)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del _pinned_users[user_id]
+            return False
+        return True
+
+
+def is_primary_copy(alias):
+    """Whether the replica alias points at the primary's own database.
+
+    That is the case for test mirrors, reading through a second connection
+    to the same database gains nothing and deadlocks on SQLite.
+    """
+    if alias not in connections.databases:
+        return False
+    replica = connections[alias].settings_dict
+    primary = connections['default'].settings_dict
+    return (replica['NAME'], replica['HOST']) == (primary['NAME'], primary['HOST'])
+
+
+def replica_databases():
+    return [
+        alias for alias in settings.REPLICA_DATABASES
+        if not is_primary_copy(alias)
+    ]
+
+
+class AnswerShardRouter:
+    """Keeps answer rows on the answer database of their poll.
+
+    Related objects loaded from an answer database are read and written there,
+    and the polls they point to are read from the primary. Queries without an
+    instance to go by name their database with ``using()``.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is None or not instance._state.db:
+            return None
+        if sharding.is_answer_model(model):
+            if sharding.is_answer_model(type(instance)):
+                return instance._state.db
+            if instance._meta.label_lower == 'polls.poll':
+                alias = sharding.database_for_poll(instance.pk)
+                return alias if alias != 'default' else None
+        elif sharding.is_answer_model(type(instance)) \
+                and instance._state.db != 'default' \
+                and instance._state.db in settings.ANSWER_DATABASES:
+            return 'default'
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._meta.app_label == obj2._meta.app_label == 'polls' and (
+                sharding.is_answer_model(type(obj1)) or sharding.is_answer_model(type(obj2))):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Answer databases get the polls tables only, the other ones stay
+        # empty there.
+        if db != 'default' and db in settings.ANSWER_DATABASES:
+            return app_label == 'polls'
+        return None
+
+
+class PrimaryReplicaRouter:
+    """Sends reads to a replica while a view marked them safe to do so.
+
+    Everything else, including every write, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'replica', False):
+            replicas = replica_databases()
+            if replicas:
+                return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serves GET and HEAD requests of the view from a read replica."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and not is_pinned(request):
+            start_replica_reads()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            stop_replica_reads()
@@ -0,0 +1,88 @@
+import csv
+import json
+
+from itertools import groupby, islice
+from operator import attrgetter
+
+from .models import Answer, PollAnswer
+from .ingest import LOOKUP_CHUNK
+from . import archive, sharding
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def questions(poll):
+    return list(poll.questions.order_by('id').values_list('id', 'text'))
+
+
+def respondents(poll, chunk_size=CHUNK_SIZE):
+    """Yield (poll answer id, user id, {question id: answer}) per respondent."""
+    answers = Answer.objects.using(sharding.database_for_poll(poll.id))
+    rows = answers.filter(poll_answer__poll_id=poll.id).order_by(
+        'poll_answer_id', 'question_id'
+    ).values_list('poll_answer_id', 'user_id', 'question_id', 'answer')
+    current, user_id, answers = None, None, {}
+    for poll_answer_id, answer_user_id, question_id, answer in rows.iterator(chunk_size):
+        if poll_answer_id != current:
+            if current is not None:
+                yield current, user_id, answers
+            current, user_id, answers = poll_answer_id, answer_user_id, {}
+        answers[question_id] = answer
+    if current is not None:
+        yield current, user_id, answers
+    if archive.is_finished(poll.date_finish):
+        yield from archived_respondents(poll)
+
+
+def archived_respondents(poll):
+    users = (
+        (user_id, list(answers))
+        for user_id, answers in groupby(archive.answers_of_poll(poll.id), attrgetter('user_id'))
+    )
+    poll_answers = PollAnswer.objects.using(sharding.database_for_poll(poll.id))
+    while True:
+        chunk = list(islice(users, LOOKUP_CHUNK))
+        if not chunk:
+            return
+        ids = dict(poll_answers.filter(
+            poll_id=poll.id, user_id__in=[user_id for user_id, _ in chunk]
+        ).values_list('user_id', 'id'))
+        for user_id, answers in chunk:
+            yield ids.get(user_id), user_id, {
+                answer.question_id: answer.answer for answer in answers
+            }
+
+
+def csv_lines(poll):
+    columns = questions(poll)
+    writer = csv.writer(Echo())
+    yield writer.writerow(['id', 'user_id'] + [text for _, text in columns])
+    for pk, user_id, answers in respondents(poll):
+        yield writer.writerow(
+            [pk, user_id] + [answers.get(question_id, '') for question_id, _ in columns]
+        )
+
+
+def ndjson_lines(poll):
+    columns = questions(poll)
+    for pk, user_id, answers in respondents(poll):
+        yield json.dumps({
+            'id': pk,
+            'user_id': user_id,
+            'answers': {
+                str(question_id): answers.get(question_id, '') for question_id, _ in columns
+            },
+        }) + '\n'
+
+
+FORMATS = {
+    'csv': ('text/csv', csv_lines),
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+}
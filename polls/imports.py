@@ -0,0 +1,94 @@
+"""Validation of offline collected submissions, see ``manage.py import_answers``.
+
+A record is the body of ``POST /answer/`` with the ``user_id`` of the
+respondent and optionally the ``created_at`` time it was collected. Records
+are checked by ``PollAnswerSerializer`` against polls and schemas handed in
+by the importing process, so they can be validated in worker processes that
+never query the database.
+"""
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .models import Poll
+from .serializers import PollAnswerSerializer
+from . import schema
+
+
+def load_poll(poll_id):
+    """(poll, schema) of a poll to validate against, None if it doesn't exist."""
+    try:
+        poll = Poll.objects.get(pk=poll_id)
+    except Poll.DoesNotExist:
+        return None
+    poll_schema = schema.get_schema(poll)
+    # The cached schema's read-only mapping can't be pickled.
+    return poll, poll_schema._replace(questions=dict(poll_schema.questions))
+
+
+def validate(lines, polls):
+    """Check (line number, line) pairs against ``polls``, {poll id: load_poll()}.
+
+    Returns (valid, rejected, unknown): (line number, line, Submission),
+    (line number, line, errors) and (line number, line, poll id) of records
+    whose poll isn't in ``polls`` yet.
+    """
+    valid, rejected, unknown = [], [], []
+    for number, line in lines:
+        try:
+            poll_id, submission = validate_record(line, polls)
+        except ValueError as error:
+            rejected.append((number, line, error.args[0]))
+            continue
+        if submission is None:
+            unknown.append((number, line, poll_id))
+        else:
+            valid.append((number, line, submission))
+    return valid, rejected, unknown
+
+
+def validate_record(line, polls):
+    """(poll id, Submission) of a record, raises ValueError with its errors.
+
+    The submission is None if the poll isn't in ``polls``.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise ValueError({'non_field_errors': ['Invalid JSON.']})
+    if not isinstance(record, dict):
+        raise ValueError({'non_field_errors': ['Invalid data. Expected a dictionary.']})
+    try:
+        user_id = int(record['user_id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError({'user_id': ['A valid integer is required.']})
+    created_at = record.get('created_at')
+    if created_at is not None:
+        try:
+            created_at = parse_datetime(created_at)
+        except (TypeError, ValueError):
+            created_at = None
+        if created_at is None:
+            raise ValueError({'created_at': ['Datetime has wrong format.']})
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at, timezone.utc)
+    try:
+        poll_id = int(record['poll'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError({'poll': ['A valid integer is required.']})
+    if poll_id not in polls:
+        return poll_id, None
+    if polls[poll_id] is None:
+        message = PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+        raise ValueError({'poll': [message.format(pk_value=poll_id)]})
+
+    poll, poll_schema = polls[poll_id]
+    serializer = PollAnswerSerializer(data=record, context={
+        'poll': poll, 'poll_schema': poll_schema, 'user_id': user_id, 'schema_only': True,
+    })
+    if not serializer.is_valid():
+        raise ValueError(serializer.errors)
+    submission = serializer.get_submission(serializer.validated_data)
+    return poll_id, submission._replace(created_at=created_at)
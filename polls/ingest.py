@@ -0,0 +1,136 @@
+from collections import namedtuple
+from contextlib import ExitStack
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Answer, AnswerChoice, PollAnswer
+from . import sharding, tallies, timeline
+
+# ``created_at`` is left out for submissions stored as they arrive.
+Submission = namedtuple(
+    'Submission', ['poll_id', 'user_id', 'answers', 'created_at'], defaults=(None,)
+)
+SubmittedAnswer = namedtuple('SubmittedAnswer', ['question_id', 'answer', 'choice_ids'])
+
+# Keeps IN (...) lists below the bound-parameter limits of the backends.
+LOOKUP_CHUNK = 500
+
+
+def _chunks(items, size=LOOKUP_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _poll_answer_ids(pairs, using='default'):
+    """Map (poll_id, user_id) pairs to the ids of their stored PollAnswers."""
+    found = {}
+    for chunk in _chunks(set(pairs)):
+        wanted = set(chunk)
+        rows = PollAnswer.objects.using(using).filter(
+            poll_id__in={poll_id for poll_id, _ in chunk},
+            user_id__in={user_id for _, user_id in chunk},
+        ).values_list('id', 'poll_id', 'user_id')
+        for pk, poll_id, user_id in rows:
+            if (poll_id, user_id) in wanted:
+                found[(poll_id, user_id)] = pk
+    return found
+
+
+def write(submissions, skip_existing=False):
+    """Store validated submissions with one bulk insert per table.
+
+    Returns the created ``PollAnswer`` objects. With ``skip_existing``
+    submissions whose user already answered the poll are left out, which
+    makes replaying the same submissions harmless.
+    """
+    poll_answers, answers, answer_choices = [], [], []
+    groups = sharding.group_by_database(submissions)
+    # The answer databases commit before the counters in the default one, a
+    # failed insert leaves the counters untouched.
+    with transaction.atomic(), ExitStack() as stack:
+        for alias in groups:
+            if alias != 'default':
+                stack.enter_context(transaction.atomic(using=alias))
+        for alias, group in groups.items():
+            created = insert(group, using=alias, skip_existing=skip_existing)
+            poll_answers.extend(created[0])
+            answers.extend(created[1])
+            answer_choices.extend(created[2])
+        tallies.increment(
+            [answer.question_id for answer in answers],
+            [answer_choice.choice_id for answer_choice in answer_choices]
+        )
+    timeline.record(poll_answers)
+    return poll_answers
+
+
+def insert(submissions, using='default', skip_existing=False, stamp=True):
+    """Insert the rows of submissions into one answer database.
+
+    Returns the created ``PollAnswer``, ``Answer`` and ``AnswerChoice``
+    objects, counters are left to the caller. Submissions without
+    ``created_at`` are dated now, unless ``stamp`` is false.
+    """
+    if skip_existing:
+        existing = _poll_answer_ids(
+            ((submission.poll_id, submission.user_id) for submission in submissions),
+            using=using
+        )
+        seen = set(existing)
+        pending = []
+        for submission in submissions:
+            pair = (submission.poll_id, submission.user_id)
+            if pair not in seen:
+                seen.add(pair)
+                pending.append(submission)
+        submissions = pending
+    if not submissions:
+        return [], [], []
+
+    now = timezone.now() if stamp else None
+    poll_answers = PollAnswer.objects.using(using).bulk_create([
+        PollAnswer(
+            poll_id=submission.poll_id, user_id=submission.user_id,
+            created_at=submission.created_at or now
+        )
+        for submission in submissions
+    ])
+    if any(poll_answer.pk is None for poll_answer in poll_answers):
+        # Backends that can't return ids from a bulk insert (SQLite).
+        ids = _poll_answer_ids(
+            ((poll_answer.poll_id, poll_answer.user_id) for poll_answer in poll_answers),
+            using=using
+        )
+        for poll_answer in poll_answers:
+            poll_answer.pk = ids[(poll_answer.poll_id, poll_answer.user_id)]
+
+    answers = Answer.objects.using(using).bulk_create([
+        Answer(
+            poll_answer_id=poll_answer.pk, user_id=submission.user_id,
+            question_id=answer.question_id, answer=answer.answer
+        )
+        for poll_answer, submission in zip(poll_answers, submissions)
+        for answer in submission.answers
+    ])
+    if any(answer.pk is None for answer in answers):
+        ids = {}
+        for chunk in _chunks(poll_answer.pk for poll_answer in poll_answers):
+            rows = Answer.objects.using(using).filter(
+                poll_answer_id__in=chunk
+            ).values_list('id', 'poll_answer_id', 'question_id')
+            for pk, poll_answer_id, question_id in rows:
+                ids[(poll_answer_id, question_id)] = pk
+        for answer in answers:
+            answer.pk = ids[(answer.poll_answer_id, answer.question_id)]
+
+    answer_choices = []
+    submitted = (answer for submission in submissions for answer in submission.answers)
+    for answer, data in zip(answers, submitted):
+        answer_choices.extend(
+            AnswerChoice(answer_id=answer.pk, choice_id=choice_id)
+            for choice_id in data.choice_ids
+        )
+    AnswerChoice.objects.using(using).bulk_create(answer_choices)
+    return poll_answers, answers, answer_choices
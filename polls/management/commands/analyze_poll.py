@@ -0,0 +1,25 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.models import Poll
+from polls import analytics
+
+
+class Command(BaseCommand):
+    help = 'Print votes, shares and co-selections of the choice questions of a poll as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('poll', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            poll = Poll.objects.get(pk=options['poll'])
+        except Poll.DoesNotExist:
+            raise CommandError(f"Poll {options['poll']} does not exist.")
+        data = analytics.load(poll)
+        self.stdout.write(json.dumps({
+            'poll': poll.id,
+            'respondents': len(data.respondents),
+            'questions': analytics.summary(data),
+        }, indent=2))
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from polls import archive, sharding
+from polls.models import Poll, Answer
+
+
+class Command(BaseCommand):
+    help = 'Move the answers of long finished polls into compressed archive blocks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Archive polls that finished more than this many days ago.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=archive.BATCH_SIZE,
+            help='Respondents per archive block.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many submissions would be archived.'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = datetime.now().date() - timedelta(days=options['days'])
+        poll_ids = Poll.objects.filter(date_finish__lt=cutoff).order_by('id').values_list(
+            'id', flat=True
+        )
+        archived = 0
+        for poll_id in poll_ids:
+            if options['dry_run']:
+                count = Answer.objects.using(sharding.database_for_poll(poll_id)).filter(
+                    poll_answer__poll_id=poll_id
+                ).values('user_id').distinct().count()
+            else:
+                count = archive.archive_poll(poll_id, options['batch_size'])
+            if count:
+                self.stdout.write(f'Poll {poll_id}: {count} submissions.')
+            archived += count
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {archived} submissions.'))
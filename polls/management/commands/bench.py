@@ -0,0 +1,168 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import URLPattern, reverse
+from rest_framework import permissions
+from rest_framework.test import APIClient
+
+from polls import urls
+from polls.models import Poll, Question, Choice
+from polls.bench import QueryRecorder, scratch_database, summarize, seed_dataset, \
+    random_answer
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and report latency percentiles, query '
+        'count and SQL time for every route of the polls API as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polls', type=int, default=10)
+        parser.add_argument('--questions', type=int, default=10, help='Questions per poll.')
+        parser.add_argument('--choices', type=int, default=4, help='Choices per choice question.')
+        parser.add_argument('--users', type=int, default=100, help='Users answering every poll.')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per route.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='File to write the report to instead of stdout.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        with scratch_database() as connection:
+            dataset = seed_dataset(
+                options['polls'], options['questions'], options['choices'],
+                options['users'], spare_users=options['repeat'], rng=self.random
+            )
+            report = {
+                'dataset': {
+                    key: options[key]
+                    for key in ('polls', 'questions', 'choices', 'users', 'seed')
+                },
+                'endpoints': {},
+            }
+            for name, route in self.routes(dataset):
+                report['endpoints'][name] = self.measure(connection, route, options['repeat'])
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+        failed = [name for name, result in report['endpoints'].items() if 'error' in result]
+        if failed:
+            raise CommandError(f"Routes answered with errors: {', '.join(failed)}.")
+
+    def routes(self, dataset):
+        poll = dataset['polls'][0]
+        question = next(
+            (q for q in dataset['questions'] if q.poll_id == poll.id),
+            None
+        )
+        choice = next(iter(dataset['choices'].values()), [None])[0]
+        objects = {'polls': poll, 'questions': question, 'choices': choice}
+        poll_questions = [q for q in dataset['questions'] if q.poll_id == poll.id]
+        choice_questions = [
+            q.id for q in poll_questions if q.question_type in Question.QUESTION_CHOICE_TYPES
+        ]
+        # Choices of answered questions can't be replaced.
+        unanswered = self.unanswered_question(poll)
+        respondent = dataset['respondent']
+        respondent.set_password('bench')
+        respondent.save(update_fields=['password'])
+        payloads = {
+            'polls-bulk': ('post', lambda user: {
+                'name': 'Bulk poll', 'description': 'Description of bulk poll',
+                'date_start': f'{poll.date_start}', 'date_finish': f'{poll.date_finish}',
+                'questions': [
+                    {'question_type': Question.TEXT, 'text': 'Text question'},
+                    {'question_type': Question.CHOICE, 'text': 'Choice question', 'choices': [
+                        {'text': 'Yes'}, {'text': 'No'}
+                    ]},
+                ],
+            }),
+            'questions-choices': ('put', lambda user: [{'text': 'Yes'}, {'text': 'No'}]),
+            'token-obtain': ('post', lambda user: {
+                'username': respondent.username, 'password': 'bench'
+            }),
+            'answers-create': ('post', lambda user: {
+                'poll': poll.id,
+                'answers': [
+                    {'question': answer.question_id, 'answer': answer.answer}
+                    for answer in (
+                        random_answer(q, dataset['choices'].get(q.id, []), self.random)
+                        for q in poll_questions
+                    )
+                ],
+            }),
+        }
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            kwargs = {}
+            if 'pk' in pattern.pattern.converters:
+                obj = unanswered if pattern.name == 'questions-choices' \
+                    else objects.get(pattern.name.split('-')[0])
+                if obj is None:
+                    continue
+                kwargs['pk'] = obj.pk
+            view_class = getattr(pattern.callback, 'cls', None)
+            admin_only = permissions.IsAdminUser in getattr(view_class, 'permission_classes', ())
+            route = {
+                'path': reverse(pattern.name, kwargs=kwargs),
+                'method': 'get',
+                'users': [dataset['admin'] if admin_only else dataset['respondent']],
+            }
+            if pattern.name == 'polls-crosstab':
+                if len(choice_questions) < 2:
+                    continue
+                route['path'] += f'?q1={choice_questions[0]}&q2={choice_questions[1]}'
+            if pattern.name in payloads:
+                route['method'], route['data'] = payloads[pattern.name]
+            if pattern.name == 'answers-create':
+                route['users'] = dataset['fresh']
+            yield pattern.name, route
+
+    def unanswered_question(self, poll):
+        unanswered = Poll.objects.create(
+            name='Unanswered poll', description='Description of unanswered poll',
+            date_start=poll.date_start, date_finish=poll.date_finish
+        )
+        question = Question.objects.create(
+            poll=unanswered, text='Question', question_type=Question.CHOICE
+        )
+        Choice.objects.create(question=question, text='Choice')
+        return question
+
+    def measure(self, connection, route, repeat):
+        client = APIClient()
+        samples, queries, sql_time, statuses = [], [], [], set()
+        for i in range(repeat):
+            user = route['users'][i % len(route['users'])]
+            client.force_authenticate(user=user)
+            kwargs = {}
+            if 'data' in route:
+                kwargs = {'data': route['data'](user), 'format': 'json'}
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                start = time.perf_counter()
+                response = getattr(client, route['method'])(route['path'], **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                samples.append(time.perf_counter() - start)
+            queries.append(recorder.count)
+            sql_time.append(recorder.time)
+            statuses.add(response.status_code)
+        result = {'method': route['method'].upper(), 'path': route['path']}
+        result['status'] = sorted(statuses)
+        errors = [code for code in result['status'] if not 200 <= code < 300]
+        if errors:
+            # Timings of rejected requests say nothing about the route.
+            result['error'] = f"answered {', '.join(map(str, errors))}"
+        result.update(summarize(samples))
+        result['queries'] = int(statistics.median(queries))
+        result['max_queries'] = max(queries)
+        result['sql_ms'] = round(statistics.median(sql_time) * 1000, 3)
+        return result
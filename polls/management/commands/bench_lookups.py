@@ -0,0 +1,81 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from polls.bench import scratch_database, timed, summarize
+
+# Last migration before PollAnswer got its user_id index and the unique
+# (poll, user_id) constraint.
+UNINDEXED_STATE = ('polls', '0002_tallies')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database with PollAnswer rows and compare user_id '
+        'lookups before and after the PollAnswer index migrations.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--polls', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        report = {'rows': options['rows']}
+        with scratch_database() as connection:
+            executor = MigrationExecutor(connection)
+            executor.migrate([UNINDEXED_STATE])
+            executor.loader.build_graph()
+            apps = executor.loader.project_state(UNINDEXED_STATE).apps
+            self.seed(apps, options['rows'], options['polls'])
+            report['before'] = self.run(apps, options)
+
+            executor.loader.build_graph()
+            executor.migrate(executor.loader.graph.leaf_nodes())
+            executor.loader.build_graph()
+            apps = executor.loader.project_state().apps
+            report['after'] = self.run(apps, options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, apps, rows, polls):
+        Poll = apps.get_model('polls', 'Poll')
+        PollAnswer = apps.get_model('polls', 'PollAnswer')
+        with transaction.atomic():
+            Poll.objects.bulk_create([
+                Poll(name=f'Poll {i}', description='', date_start='2020-01-01',
+                     date_finish='2020-01-01')
+                for i in range(polls)
+            ])
+            poll_ids = list(Poll.objects.order_by('id').values_list('id', flat=True))
+            batch = []
+            for i in range(rows):
+                batch.append(PollAnswer(poll_id=poll_ids[i % polls], user_id=i // polls))
+                if len(batch) == 10000:
+                    PollAnswer.objects.bulk_create(batch)
+                    batch = []
+            PollAnswer.objects.bulk_create(batch)
+
+    def run(self, apps, options):
+        PollAnswer = apps.get_model('polls', 'PollAnswer')
+        polls = options['polls']
+        users = max(options['rows'] // polls, 1)
+        lookups = {
+            'done_page': lambda: list(
+                PollAnswer.objects.filter(
+                    user_id=random.randrange(users)
+                ).order_by('poll_id').values_list('id', flat=True)[:50]
+            ),
+            'duplicate_check': lambda: PollAnswer.objects.filter(
+                poll_id=random.randrange(polls) + 1,
+                user_id=random.randrange(users)
+            ).exists(),
+        }
+        return {
+            name: summarize(timed(lookup, options['repeat']))
+            for name, lookup in lookups.items()
+        }
@@ -0,0 +1,65 @@
+import json
+import random
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from polls import readpath
+from polls.api_views import ActivePollListView, PollDoneListView
+from polls.bench import scratch_database, seed_dataset, summarize, timed
+from polls.models import PollAnswer
+from polls.serializers import ActivePollSerializer, PollDoneSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the serializer and values() read paths of the active and '
+        'done poll lists on a seeded throwaway database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polls', type=int, default=20)
+        parser.add_argument('--questions', type=int, default=60)
+        parser.add_argument('--choices', type=int, default=8)
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        with scratch_database():
+            dataset = seed_dataset(
+                options['polls'], options['questions'], options['choices'],
+                options['users'], rng=random.Random(options['seed'])
+            )
+            active = ActivePollListView().get_queryset
+            done = PollAnswer.objects.filter(user_id=dataset['respondent'].id)
+            done_view = PollDoneListView(request=SimpleNamespace(user=dataset['respondent']))
+            paths = {
+                'active_polls': {
+                    'serializer': lambda: renderer.render(
+                        ActivePollSerializer(active(), many=True).data
+                    ),
+                    'values': lambda: renderer.render(readpath.active_polls(active())),
+                },
+                'done_polls': {
+                    'serializer': lambda: renderer.render(
+                        PollDoneSerializer(done_view.get_queryset(), many=True).data
+                    ),
+                    'values': lambda: renderer.render(
+                        readpath.done_polls(list(done.values(*readpath.DONE_POLL_FIELDS)))
+                    ),
+                },
+            }
+            report = {}
+            for name, variants in paths.items():
+                report[name] = {
+                    variant: summarize(timed(render, options['repeat']))
+                    for variant, render in variants.items()
+                }
+                report[name]['identical'] = len({render() for render in variants.values()}) == 1
+                report[name]['speedup'] = round(
+                    report[name]['serializer']['p50_ms'] / report[name]['values']['p50_ms'], 2
+                )
+        self.stdout.write(json.dumps(report, indent=2))
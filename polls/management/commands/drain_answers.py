@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+
+from polls import ingest
+from polls.spool import get_spool
+
+
+class Command(BaseCommand):
+    help = 'Write spooled answer submissions to the database in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--follow', action='store_true',
+            help='Keep waiting for new submissions instead of exiting when the spool is empty.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds to wait between polls of an empty spool with --follow.'
+        )
+
+    def handle(self, *args, **options):
+        spool = get_spool()
+        written = 0
+        while True:
+            entries = spool.read(options['batch_size'])
+            if not entries:
+                if not options['follow']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            written += self.write(entries)
+            # Entries are removed only after their rows are committed, a
+            # drain that dies in between re-reads them and skips them.
+            spool.remove([pk for pk, _ in entries])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} submissions.'))
+
+    def write(self, entries):
+        submissions = [submission for _, submission in entries]
+        try:
+            return len(ingest.write(submissions, skip_existing=True))
+        except IntegrityError:
+            # A submission for the same user and poll got in through the
+            # synchronous path meanwhile, retry one by one.
+            written = 0
+            for submission in submissions:
+                try:
+                    with transaction.atomic():
+                        written += len(ingest.write([submission], skip_existing=True))
+                except IntegrityError:
+                    pass
+            return written
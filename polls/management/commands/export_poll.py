@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.models import Poll
+from polls import export
+
+
+class Command(BaseCommand):
+    help = 'Write every response of a poll as CSV or NDJSON, one row per respondent.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('poll', type=int)
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write to instead of stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            poll = Poll.objects.get(pk=options['poll'])
+        except Poll.DoesNotExist:
+            raise CommandError(f"Poll {options['poll']} does not exist.")
+        _, lines = export.FORMATS[options['format']]
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines(poll))
+        else:
+            for line in lines(poll):
+                self.stdout.write(line, ending='')
@@ -0,0 +1,118 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+
+from polls import imports, ingest
+
+
+class Command(BaseCommand):
+    help = 'Import offline collected answer submissions from an NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--rejects',
+            help='NDJSON file for the rejected records, <path>.rejects by default.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Validating processes, 0 validates in this one.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Records validated and written together.'
+        )
+
+    def handle(self, *args, **options):
+        self.polls = {}
+        self.imported = self.rejected = 0
+        rejects_path = options['rejects'] or f"{options['path']}.rejects"
+        try:
+            source = open(options['path'], encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+        with source, open(rejects_path, 'w', encoding='utf-8') as self.rejects:
+            chunks = self.chunks(source, options['chunk_size'])
+            if options['workers']:
+                self.validate_in_pool(chunks, options['workers'])
+            else:
+                for chunk in chunks:
+                    self.save(imports.validate(chunk, self.polls))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} submissions, rejected {self.rejected}'
+            f' (see {rejects_path}).'
+        ))
+
+    def chunks(self, source, size):
+        lines = ((number, line) for number, line in enumerate(source, 1) if line.strip())
+        while True:
+            chunk = list(islice(lines, size))
+            if not chunk:
+                return
+            yield chunk
+
+    def validate_in_pool(self, chunks, workers):
+        # Workers don't query, they mustn't share the connections either.
+        connections.close_all()
+        with ProcessPoolExecutor(workers) as executor:
+            # A few chunks per worker are in flight, the rest of the file is
+            # read as they are written.
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(imports.validate, chunk, dict(self.polls)))
+                if len(pending) >= 2 * workers:
+                    self.save(pending.popleft().result())
+            while pending:
+                self.save(pending.popleft().result())
+
+    def save(self, result):
+        valid, rejected, unknown = result
+        if unknown:
+            # Polls the workers weren't given, they are from the next chunks on.
+            for poll_id in {poll_id for _, _, poll_id in unknown}:
+                self.polls[poll_id] = imports.load_poll(poll_id)
+            more_valid, more_rejected, _ = imports.validate(
+                [(number, line) for number, line, _ in unknown], self.polls
+            )
+            valid = valid + more_valid
+            rejected = rejected + more_rejected
+        stored, duplicates = self.write(valid)
+        rejected = rejected + duplicates
+        for number, line, errors in sorted(rejected, key=lambda item: item[0]):
+            self.rejects.write(json.dumps({
+                'line': number, 'errors': errors, 'record': line.rstrip('\n')
+            }) + '\n')
+        self.imported += stored
+        self.rejected += len(rejected)
+
+    def write(self, valid):
+        """Store the submissions, returns their count and the rejected duplicates."""
+        submissions = [submission for _, _, submission in valid]
+        try:
+            created = ingest.write(submissions, skip_existing=True)
+        except IntegrityError:
+            # Answers to the same polls came in through the API meanwhile,
+            # retry one by one.
+            created = []
+            for submission in submissions:
+                try:
+                    with transaction.atomic():
+                        created.extend(ingest.write([submission], skip_existing=True))
+                except IntegrityError:
+                    pass
+        stored = {(poll_answer.poll_id, poll_answer.user_id) for poll_answer in created}
+        duplicates = []
+        for number, line, submission in valid:
+            pair = (submission.poll_id, submission.user_id)
+            if pair in stored:
+                stored.remove(pair)
+            else:
+                duplicates.append(
+                    (number, line, {'poll': ['Poll has already been answered.']})
+                )
+        return len(created), duplicates
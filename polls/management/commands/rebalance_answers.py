@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from polls import ingest, sharding
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import PollAnswer, Answer, AnswerChoice, AnswerArchive
+
+
+class Command(BaseCommand):
+    help = 'Move stored answers to the answer database their poll belongs to.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--source', action='append', dest='sources', default=[],
+            help='Also move answers out of this database alias, e.g. one that '
+                 'was removed from the answer databases (repeatable).'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many submissions would move.'
+        )
+
+    def handle(self, *args, **options):
+        sources = ['default'] + sharding.answer_databases() + options['sources']
+        moved = 0
+        for source in dict.fromkeys(sources):
+            if source not in connections.databases:
+                raise CommandError(f'Database {source} is not configured.')
+            poll_ids = set(PollAnswer.objects.using(source).values_list(
+                'poll_id', flat=True
+            ).distinct())
+            poll_ids.update(AnswerArchive.objects.using(source).values_list(
+                'poll_id', flat=True
+            ).distinct())
+            for poll_id in sorted(poll_ids):
+                target = sharding.database_for_poll(poll_id)
+                if target == source:
+                    continue
+                if options['dry_run']:
+                    count = PollAnswer.objects.using(source).filter(poll_id=poll_id).count()
+                    self.stdout.write(f'Poll {poll_id}: {count} from {source} to {target}.')
+                    moved += count
+                    continue
+                # Archives go first, they are found again by their own rows
+                # if the move stops in between.
+                self.move_archives(poll_id, source, target)
+                moved += self.move(poll_id, source, target, options['batch_size'])
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {moved} submissions.'))
+
+    def move(self, poll_id, source, target, batch_size):
+        moved = 0
+        while True:
+            poll_answers = list(
+                PollAnswer.objects.using(source).filter(poll_id=poll_id).order_by(
+                    'id'
+                ).values_list('id', 'user_id', 'created_at')[:batch_size]
+            )
+            if not poll_answers:
+                return moved
+            submissions = self.read(source, poll_id, poll_answers)
+            # Copied rows are committed before the originals are deleted, a
+            # move that dies in between skips them on the next run.
+            with transaction.atomic(using=target):
+                ingest.insert(submissions, using=target, skip_existing=True, stamp=False)
+            with transaction.atomic(using=source):
+                PollAnswer.objects.using(source).filter(
+                    id__in=[pk for pk, _, _ in poll_answers]
+                ).delete()
+            moved += len(poll_answers)
+
+    def move_archives(self, poll_id, source, target):
+        fields = [
+            field.attname for field in AnswerArchive._meta.concrete_fields
+            if not field.primary_key
+        ]
+        archives = AnswerArchive.objects.using(source).filter(poll_id=poll_id)
+        for pk in list(archives.order_by('id').values_list('id', flat=True)):
+            values = archives.values(*fields).get(pk=pk)
+            # A copy left by a move that stopped before the delete is kept.
+            with transaction.atomic(using=target):
+                lookup = {field: values[field] for field in fields if field != 'data'}
+                if not AnswerArchive.objects.using(target).filter(**lookup).exists():
+                    AnswerArchive.objects.using(target).create(**values)
+            AnswerArchive.objects.using(source).filter(pk=pk).delete()
+
+    def read(self, source, poll_id, poll_answers):
+        ids = [pk for pk, _, _ in poll_answers]
+        choice_ids = {}
+        for answer_id, choice_id in AnswerChoice.objects.using(source).filter(
+                answer__poll_answer_id__in=ids).order_by('id').values_list('answer_id', 'choice_id'):
+            choice_ids.setdefault(answer_id, []).append(choice_id)
+        answers = {}
+        for pk, poll_answer_id, question_id, answer in Answer.objects.using(source).filter(
+                poll_answer_id__in=ids).order_by('id').values_list(
+                'id', 'poll_answer_id', 'question_id', 'answer'):
+            answers.setdefault(poll_answer_id, []).append(
+                SubmittedAnswer(question_id, answer, choice_ids.get(pk, []))
+            )
+        return [
+            Submission(poll_id, user_id, answers.get(pk, []), created_at)
+            for pk, user_id, created_at in poll_answers
+        ]
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.models import Poll
+from polls import tallies
+
+
+class Command(BaseCommand):
+    help = 'Rebuild question and choice counters from stored answers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll', type=int, action='append', dest='polls',
+            help='Only rebuild counters of the given poll id (repeatable).'
+        )
+
+    def handle(self, *args, **options):
+        if not options['polls']:
+            tallies.rebuild()
+            self.stdout.write(self.style.SUCCESS('Rebuilt counters for all polls.'))
+            return
+        for pk in options['polls']:
+            try:
+                poll = Poll.objects.get(pk=pk)
+            except Poll.DoesNotExist:
+                raise CommandError(f'Poll {pk} does not exist.')
+            tallies.rebuild(poll)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for poll {pk}.'))
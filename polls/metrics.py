@@ -0,0 +1,188 @@
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_local = threading.local()
+
+
+class RequestStats:
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_queries += 1
+            self.sql_time += time.perf_counter() - start
+
+
+@contextmanager
+def serializer_timer():
+    # Only the outermost serializer call is timed, nested serializers run
+    # inside it.
+    stats = getattr(_local, 'stats', None)
+    if stats is None or stats.serializer_depth:
+        if stats is not None:
+            stats.serializer_depth += 1
+        try:
+            yield
+        finally:
+            if stats is not None:
+                stats.serializer_depth -= 1
+        return
+    stats.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_depth -= 1
+        stats.serializer_time += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+    def run_validation(self, *args, **kwargs):
+        with serializer_timer():
+            return super().run_validation(*args, **kwargs)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """Per-route histograms of this process.
+
+    Every worker keeps its own registry, the scraper aggregates them.
+    """
+
+    METRICS = (
+        ('polls_request_duration_seconds', 'Total time spent in the view.', DURATION_BUCKETS),
+        ('polls_sql_duration_seconds', 'Time spent in SQL queries.', DURATION_BUCKETS),
+        ('polls_sql_queries', 'Number of SQL queries.', QUERY_BUCKETS),
+        ('polls_serializer_duration_seconds', 'Time spent in serializers.', DURATION_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, route, values):
+        with self._lock:
+            for (name, _, buckets), value in zip(self.METRICS, values):
+                key = (name, route)
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram(buckets)
+                self._histograms[key].observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, description, _ in self.METRICS:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                routes = sorted(route for metric, route in self._histograms if metric == name)
+                for route in routes:
+                    histogram = self._histograms[(name, route)]
+                    label = route.replace('\\', '\\\\').replace('"', '\\"')
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{route="{label}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{route="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{route="{label}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{route="{label}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+@contextmanager
+def recording(stats):
+    _local.stats = stats
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield
+    finally:
+        _local.stats = None
+
+
+class MetricsMiddleware:
+    """Measures SQL, serializer and total time of every request.
+
+    The numbers are sent back in a ``Server-Timing`` header and collected in
+    per-route histograms served by ``/api/v1/metrics``. The histograms of
+    streamed responses include the time and queries until the last chunk,
+    their header only covers the view, it is sent before the content.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        start = time.perf_counter()
+        with recording(stats):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={stats.sql_time * 1000:.3f};desc="{stats.sql_queries} queries"',
+            f'serializer;dur={stats.serializer_time * 1000:.3f}',
+            f'total;dur={total * 1000:.3f}',
+        ])
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.route) if match else 'unmatched'
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, stats, start, route
+            )
+        else:
+            self.observe(route, stats, total)
+        return response
+
+    def stream(self, content, stats, start, route):
+        try:
+            while True:
+                with recording(stats):
+                    chunk = next(content, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.observe(route, stats, time.perf_counter() - start)
+
+    def observe(self, route, stats, total):
+        registry.observe(
+            route, (total, stats.sql_time, stats.sql_queries, stats.serializer_time)
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_tallies'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pollanswer',
+            index=models.Index(fields=['user_id', 'id'], name='pollanswer_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_pollanswer_user_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerChoice',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_choices', to='polls.Answer')),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_choices', to='polls.Choice')),
+            ],
+            options={
+                'unique_together': {('answer', 'choice')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:45
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_answer_choices(apps, schema_editor):
+    Choice = apps.get_model('polls', 'Choice')
+    Answer = apps.get_model('polls', 'Answer')
+    AnswerChoice = apps.get_model('polls', 'AnswerChoice')
+    db_alias = schema_editor.connection.alias
+
+    choices = {}
+    for choice_id, question_id, text in Choice.objects.using(db_alias).values_list(
+            'id', 'question_id', 'text').iterator():
+        choices.setdefault(question_id, {}).setdefault(text, choice_id)
+
+    batch = []
+    answers = Answer.objects.using(db_alias).filter(
+        question__question_type__in=['choice', 'multiple choice']
+    ).values_list('id', 'question_id', 'answer')
+    for answer_id, question_id, text in answers.iterator():
+        question_choices = choices.get(question_id, {})
+        selected = {question_choices.get(part) for part in text.split(';')}
+        selected.discard(None)
+        batch.extend(
+            AnswerChoice(answer_id=answer_id, choice_id=choice_id)
+            for choice_id in selected
+        )
+        if len(batch) >= BATCH_SIZE:
+            AnswerChoice.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    AnswerChoice.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_answerchoice'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_answer_choices, migrations.RunPython.noop),
+    ]
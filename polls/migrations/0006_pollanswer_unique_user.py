@@ -0,0 +1,39 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:44
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_repeated_poll_answers(apps, schema_editor):
+    # Keep the first submission of every user for a poll, the later ones are
+    # client retries. Counters have to be rebuilt afterwards with
+    # ``manage.py rebuild_tallies``.
+    PollAnswer = apps.get_model('polls', 'PollAnswer')
+    db_alias = schema_editor.connection.alias
+    repeated = PollAnswer.objects.using(db_alias).values('poll_id', 'user_id').annotate(
+        first_id=Min('id'), count=Count('id')
+    ).filter(count__gt=1).order_by()
+    for group in list(repeated):
+        PollAnswer.objects.using(db_alias).filter(
+            poll_id=group['poll_id'], user_id=group['user_id'], id__gt=group['first_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_backfill_answerchoice'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='answer',
+            name='user_id',
+            field=models.IntegerField(db_index=True),
+        ),
+        migrations.RunPython(delete_repeated_poll_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pollanswer',
+            constraint=models.UniqueConstraint(fields=('poll', 'user_id'), name='unique_poll_answer_per_user'),
+        ),
+    ]
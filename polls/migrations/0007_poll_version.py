@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_pollanswer_unique_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.10 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_poll_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pollanswer',
+            name='pollanswer_user_id_idx',
+        ),
+        migrations.AlterField(
+            model_name='answer',
+            name='question',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='question_answers', to='polls.Question'),
+        ),
+        migrations.AlterField(
+            model_name='answerchoice',
+            name='choice',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer_choices', to='polls.Choice'),
+        ),
+        migrations.AlterField(
+            model_name='pollanswer',
+            name='poll',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='poll_answers', to='polls.Poll'),
+        ),
+        migrations.AddIndex(
+            model_name='pollanswer',
+            index=models.Index(fields=['user_id', 'poll'], name='pollanswer_user_poll_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.10 on 2026-10-18 21:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0008_answer_shards'),
+    ]
+
+    operations = [
+        # Added without a default first, so stored answers aren't dated to
+        # the time of the migration.
+        migrations.AddField(
+            model_name='pollanswer',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pollanswer',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pollanswer',
+            index=models.Index(fields=['poll', 'created_at'], name='pollanswer_poll_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.10 on 2026-10-18 22:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_pollanswer_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_user_id', models.IntegerField()),
+                ('last_user_id', models.IntegerField()),
+                ('submissions', models.PositiveIntegerField()),
+                ('tallies', models.TextField()),
+                ('data', models.BinaryField()),
+                ('poll', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer_archives', to='polls.Poll')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='answerarchive',
+            index=models.Index(fields=['poll', 'first_user_id'], name='answerarchive_poll_user_idx'),
+        ),
+    ]
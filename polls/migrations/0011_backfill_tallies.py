@@ -0,0 +1,55 @@
+# Generated by Django 2.2.10 on 2026-10-18 21:10
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def raise_counts(model, key, field, counts, db_alias):
+    """Create the missing counters and raise the ones below ``counts``."""
+    stored = dict(model.objects.using(db_alias).values_list(key, field))
+    model.objects.using(db_alias).bulk_create([
+        model(**{key: pk, field: amount})
+        for pk, amount in counts.items() if pk not in stored
+    ])
+    by_amount = {}
+    for pk, amount in counts.items():
+        if pk in stored and stored[pk] < amount:
+            by_amount.setdefault(amount, []).append(pk)
+    for amount, pks in by_amount.items():
+        model.objects.using(db_alias).filter(**{f'{key}__in': pks}).update(**{field: amount})
+
+
+def backfill_tallies(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    # Counters are only kept in the default database.
+    if db_alias != 'default':
+        return
+    Answer = apps.get_model('polls', 'Answer')
+    AnswerChoice = apps.get_model('polls', 'AnswerChoice')
+    QuestionTally = apps.get_model('polls', 'QuestionTally')
+    ChoiceTally = apps.get_model('polls', 'ChoiceTally')
+
+    # Answers stored before the counters existed were never counted. Counters
+    # are only raised, the ones of answers on other databases or in archives
+    # are left as they are.
+    responses = dict(
+        Answer.objects.using(db_alias).values_list('question_id')
+        .annotate(count=Count('id')).order_by()
+    )
+    votes = dict(
+        AnswerChoice.objects.using(db_alias).values_list('choice_id')
+        .annotate(count=Count('id')).order_by()
+    )
+    raise_counts(QuestionTally, 'question_id', 'responses', responses, db_alias)
+    raise_counts(ChoiceTally, 'choice_id', 'votes', votes, db_alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_answer_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
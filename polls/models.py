@@ -1,14 +1,82 @@
+import threading
+from contextlib import contextmanager
+
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.core.exceptions import ValidationError
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import active_polls, poll_schemas
+from . import sharding
+
+
+class TrackedModel(models.Model):
+    """Remembers the field values an instance was loaded or last saved with.
+
+    Saving an existing instance only updates the fields that changed since,
+    and ``loaded_value`` gives the stored value without a query.
+    """
+    # Fields that are never written by save() of an existing row.
+    untracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
+    def loaded_value(self, attname):
+        return getattr(self, '_loaded_values', {}).get(attname)
 
-class Poll(models.Model):
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        fields = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.name in self.untracked_fields:
+                continue
+            if field.attname not in self.__dict__:
+                # Deferred and never loaded, so it can't have changed.
+                continue
+            if loaded is None or field.attname not in loaded \
+                    or loaded[field.attname] != getattr(self, field.attname):
+                fields.append(field.name)
+        return fields
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = self.changed_fields()
+        super().save(*args, **kwargs)
+        self._remember_values()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_values()
+
+    def _remember_values(self):
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+
+class Poll(TrackedModel):
     name = models.CharField(max_length=255)
     description = models.TextField()
     date_start = models.DateField()
     date_finish = models.DateField()
+    # Bumped on every change of the poll, its questions or their choices.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    # ``version`` is only changed by bump_poll_version, so saving a stale
+    # instance can't move it backwards.
+    untracked_fields = ('version',)
 
     def __str__(self):
         return self.name
@@ -18,7 +86,7 @@ class Poll(models.Model):
             raise ValidationError('Finish date must be same or after start date.')
 
 
-class QuestionBase(models.Model):
+class QuestionBase(TrackedModel):
     class Meta:
         abstract = True
 
@@ -46,7 +114,7 @@ class Question(QuestionBase):
         return self.text
 
 
-class Choice(models.Model):
+class Choice(TrackedModel):
     question = models.ForeignKey(
         'Question', on_delete=models.CASCADE,
         related_name='choices'
@@ -58,14 +126,14 @@ class Choice(models.Model):
 
 
 class Answer(models.Model):
-    user_id = models.IntegerField()
+    user_id = models.IntegerField(db_index=True)
     poll_answer = models.ForeignKey(
         'PollAnswer', on_delete=models.CASCADE,
         related_name='answers'
     )
     question = models.ForeignKey(
         'Question', on_delete=models.CASCADE,
-        related_name='question_answers'
+        related_name='question_answers', db_constraint=False
     )
     answer = models.TextField()
 
@@ -73,20 +141,210 @@ class Answer(models.Model):
         return self.answer
 
 
+class AnswerChoice(models.Model):
+    answer = models.ForeignKey(
+        'Answer', on_delete=models.CASCADE,
+        related_name='answer_choices'
+    )
+    choice = models.ForeignKey(
+        'Choice', on_delete=models.CASCADE,
+        related_name='answer_choices', db_constraint=False
+    )
+
+    class Meta:
+        unique_together = ('answer', 'choice')
+
+
 class PollAnswer(models.Model):
+    # Answer rows can live in another database than the polls, see
+    # polls.sharding, so their foreign keys have no constraints.
     poll = models.ForeignKey(
         'Poll', on_delete=models.CASCADE,
-        related_name='poll_answers'
+        related_name='poll_answers', db_constraint=False
     )
     user_id = models.IntegerField()
+    # Null for answers stored before submissions were timestamped.
+    created_at = models.DateTimeField(default=timezone.now, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'poll'], name='pollanswer_user_poll_idx'),
+            models.Index(fields=['poll', 'created_at'], name='pollanswer_poll_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['poll', 'user_id'], name='unique_poll_answer_per_user'
+            ),
+        ]
+
+
+class AnswerArchive(models.Model):
+    """Answers of a range of users of a finished poll, see polls.archive."""
+    poll = models.ForeignKey(
+        'Poll', on_delete=models.CASCADE,
+        related_name='answer_archives', db_constraint=False
+    )
+    first_user_id = models.IntegerField()
+    last_user_id = models.IntegerField()
+    submissions = models.PositiveIntegerField()
+    # JSON counts the answers add to the poll's tallies.
+    tallies = models.TextField()
+    data = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['poll', 'first_user_id'], name='answerarchive_poll_user_idx'),
+        ]
+
+
+class QuestionTally(models.Model):
+    question = models.OneToOneField(
+        'Question', on_delete=models.CASCADE,
+        primary_key=True, related_name='tally'
+    )
+    responses = models.PositiveIntegerField(default=0)
+
+
+class ChoiceTally(models.Model):
+    choice = models.OneToOneField(
+        'Choice', on_delete=models.CASCADE,
+        primary_key=True, related_name='tally'
+    )
+    votes = models.PositiveIntegerField(default=0)
 
 
 @receiver(pre_save, sender=Poll)
 def check_date_start_is_change(sender, instance, **kwargs):
-    try:
-        obj = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        pass
+    loaded = getattr(instance, '_loaded_values', {})
+    if not instance._state.adding and 'date_start' not in instance.__dict__:
+        # Deferred and never set, save() doesn't write it.
+        return
+    if not instance._state.adding and 'date_start' in loaded:
+        date_start = loaded['date_start']
     else:
-        if not obj.date_start == instance.date_start:
-            raise ValidationError('Start date can not be modify.')
+        # New instance possibly with the pk of a stored poll, or one loaded
+        # without date_start that got it set.
+        if instance.pk is None:
+            return
+        try:
+            date_start = sender.objects.values_list('date_start', flat=True).get(pk=instance.pk)
+        except sender.DoesNotExist:
+            return
+    if not date_start == instance.date_start:
+        raise ValidationError('Start date can not be modify.')
+
+
+@receiver(post_save, sender=Poll)
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Poll)
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Choice)
+def invalidate_active_polls(sender, **kwargs):
+    active_polls.invalidate()
+
+
+@receiver(post_save, sender=Poll)
+@receiver(post_delete, sender=Poll)
+def evict_poll_schema(sender, instance, **kwargs):
+    poll_schemas.evict(instance.pk)
+
+
+def parent_ids(instance, attname):
+    """The parent id in ``attname`` and the stored one it was moved from, if any."""
+    ids = {getattr(instance, attname)}
+    loaded = instance.loaded_value(attname)
+    if loaded is not None:
+        ids.add(loaded)
+    return ids
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def evict_poll_schema_of_question(sender, instance, **kwargs):
+    for poll_id in parent_ids(instance, 'poll_id'):
+        poll_schemas.evict(poll_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def evict_poll_schema_of_choice(sender, instance, **kwargs):
+    # The version bump covers choices whose question isn't loaded, looking
+    # it up here would cost a query per deleted choice.
+    if Choice.question.is_cached(instance):
+        poll_schemas.evict(instance.question.poll_id)
+    previous = parent_ids(instance, 'question_id') - {instance.question_id}
+    if previous:
+        # Moved from another question, rare enough for the query.
+        for poll_id in Question.objects.filter(pk__in=previous).values_list('poll_id', flat=True):
+            poll_schemas.evict(poll_id)
+
+
+@receiver(post_delete, sender=Poll)
+def delete_sharded_poll_answers(sender, instance, **kwargs):
+    # Answers in the default database go with the cascade.
+    alias = sharding.database_for_poll(instance.pk)
+    if alias != 'default':
+        PollAnswer.objects.using(alias).filter(poll_id=instance.pk).delete()
+        AnswerArchive.objects.using(alias).filter(poll_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Question)
+def delete_sharded_answers(sender, instance, **kwargs):
+    alias = sharding.database_for_poll(instance.poll_id)
+    if alias != 'default':
+        Answer.objects.using(alias).filter(question_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Choice)
+def delete_sharded_answer_choices(sender, instance, **kwargs):
+    for alias in sharding.answer_databases():
+        if alias != 'default':
+            AnswerChoice.objects.using(alias).filter(choice_id=instance.pk).delete()
+
+
+_bumps = threading.local()
+
+
+def bump_poll_version(**lookup):
+    pending = getattr(_bumps, 'pending', None)
+    if pending is not None:
+        pending.add(tuple(sorted(lookup.items())))
+        return
+    Poll.objects.filter(**lookup).update(version=F('version') + 1)
+
+
+@contextmanager
+def batched_version_bumps():
+    """Apply the version bumps requested inside the block once each, at exit."""
+    if getattr(_bumps, 'pending', None) is not None:
+        yield
+        return
+    _bumps.pending = set()
+    try:
+        yield
+        pending = _bumps.pending
+    finally:
+        _bumps.pending = None
+    for lookup in pending:
+        bump_poll_version(**dict(lookup))
+
+
+@receiver(post_save, sender=Poll)
+def bump_version_on_poll_change(sender, instance, created, **kwargs):
+    if not created:
+        bump_poll_version(pk=instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_version_on_question_change(sender, instance, **kwargs):
+    for poll_id in parent_ids(instance, 'poll_id'):
+        bump_poll_version(pk=poll_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def bump_version_on_choice_change(sender, instance, **kwargs):
+    for question_id in parent_ids(instance, 'question_id'):
+        bump_poll_version(questions__id=question_id)
@@ -0,0 +1,170 @@
+"""Read-only payloads built straight from ``values()`` rows.
+
+Each function returns exactly what the matching serializer renders, without
+instantiating models or serializer fields.
+"""
+from operator import itemgetter
+
+from .models import Poll, Question, Choice, Answer, PollAnswer
+from .cache import completed_polls
+from . import archive, sharding
+
+
+def active_polls(polls):
+    """Same output as ``ActivePollSerializer(polls, many=True).data``."""
+    rows = list(polls.values('id', 'name', 'description', 'date_finish'))
+    poll_ids = [row['id'] for row in rows]
+    choices = {}
+    for pk, question_id, text in Choice.objects.filter(
+            question__poll_id__in=poll_ids).order_by('id').values_list('id', 'question_id', 'text'):
+        choices.setdefault(question_id, []).append({'id': pk, 'text': text})
+    questions = {}
+    for pk, poll_id, question_type, text in Question.objects.filter(
+            poll_id__in=poll_ids).order_by('id').values_list('id', 'poll_id', 'question_type', 'text'):
+        questions.setdefault(poll_id, []).append({
+            'id': pk,
+            'poll': poll_id,
+            'question_type': question_type,
+            'text': text,
+            'choices': choices.get(pk, []),
+        })
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'date_finish': row['date_finish'].isoformat(),
+            'questions': questions.get(row['id'], []),
+        }
+        for row in rows
+    ]
+
+
+DONE_POLL_FIELDS = (
+    'id', 'poll_id', 'user_id', 'poll__name', 'poll__description', 'poll__date_finish'
+)
+
+# Answer databases other than the default one have no polls to join.
+SHARDED_DONE_POLL_FIELDS = ('id', 'poll_id', 'user_id')
+
+
+def done_poll_fields():
+    return SHARDED_DONE_POLL_FIELDS if sharding.is_sharded() else DONE_POLL_FIELDS
+
+
+def done_polls(rows):
+    """Same output as ``PollDoneSerializer(poll_answers, many=True).data``.
+
+    ``rows`` are ``PollAnswer`` values with ``done_poll_fields()`` of a single
+    user, so every row has its own poll.
+    """
+    if rows and 'poll__name' not in rows[0]:
+        rows = _with_polls(rows)
+    answers = {}
+    for alias, group in sharding.group_by_database(rows, itemgetter('poll_id')).items():
+        answers.update(_done_answers(alias, group))
+    return [
+        {
+            'poll': {
+                'id': row['poll_id'],
+                'name': row['poll__name'],
+                'description': row['poll__description'],
+                'date_finish': row['poll__date_finish'],
+            },
+            'answers': answers.get(row['poll_id'], []),
+        }
+        for row in rows
+    ]
+
+
+def _with_polls(rows):
+    polls = {
+        row['id']: row for row in Poll.objects.filter(
+            id__in=[row['poll_id'] for row in rows]
+        ).values('id', 'name', 'description', 'date_finish')
+    }
+    return [
+        dict(
+            row,
+            poll__name=polls[row['poll_id']]['name'],
+            poll__description=polls[row['poll_id']]['description'],
+            poll__date_finish=polls[row['poll_id']]['date_finish'],
+        )
+        for row in rows if row['poll_id'] in polls
+    ]
+
+
+def _done_answers(alias, rows):
+    """Answers of the rows stored on ``alias``, by poll id."""
+    poll_ids = {row['id']: row['poll_id'] for row in rows}
+    answers = sharding.on_database(Answer.objects, alias).filter(
+        poll_answer_id__in=list(poll_ids)
+    ).order_by('id')
+    if alias == 'default':
+        values = answers.values_list(
+            'poll_answer_id', 'question_id', 'question__question_type', 'question__text', 'answer'
+        )
+    else:
+        values = list(answers.values_list('poll_answer_id', 'question_id', 'answer'))
+        questions = {
+            pk: (question_type, text) for pk, question_type, text in Question.objects.filter(
+                id__in={question_id for _, question_id, _ in values}
+            ).values_list('id', 'question_type', 'text')
+        }
+        values = [
+            (poll_answer_id, question_id) + questions[question_id] + (answer,)
+            for poll_answer_id, question_id, answer in values if question_id in questions
+        ]
+    found = {}
+    for poll_answer_id, question_id, question_type, text, answer in values:
+        found.setdefault(poll_ids[poll_answer_id], []).append({
+            'question': {'id': question_id, 'question_type': question_type, 'text': text},
+            'answer': answer,
+        })
+    archived = [
+        (row['poll_id'], row['user_id']) for row in rows
+        if row['poll_id'] not in found and archive.is_finished(row['poll__date_finish'])
+    ]
+    if archived:
+        found.update(_archived_answers(alias, archived))
+    return found
+
+
+def _archived_answers(alias, pairs):
+    archived = archive.answers_of(alias, pairs)
+    questions = {
+        pk: (question_type, text) for pk, question_type, text in Question.objects.filter(
+            id__in={answer.question_id for answers in archived.values() for answer in answers}
+        ).values_list('id', 'question_type', 'text')
+    }
+    return {
+        poll_id: [
+            {
+                'question': {
+                    'id': answer.question_id,
+                    'question_type': questions[answer.question_id][0],
+                    'text': questions[answer.question_id][1],
+                },
+                'answer': answer.answer,
+            }
+            for answer in answers if answer.question_id in questions
+        ]
+        for (poll_id, _), answers in archived.items()
+    }
+
+
+def completed_poll_ids(user_id):
+    """Ids of the polls the user answered, cached per user."""
+    completed = completed_polls.get(user_id)
+    if completed is None:
+        completed = frozenset(sharding.fan_out(
+            PollAnswer.objects.filter(user_id=user_id).values_list('poll_id', flat=True)
+        ))
+        completed_polls.set(user_id, completed)
+    return completed
+
+
+def remember_completed_poll(user_id, poll_id):
+    completed = completed_polls.get(user_id)
+    if completed is not None:
+        completed_polls.set(user_id, completed | {poll_id})
@@ -0,0 +1,16 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class CSVRenderer(JSONRenderer):
+    """Selects the CSV export through ``?format=csv``.
+
+    Exports themselves are streamed by the view, only error responses are
+    rendered, and they stay JSON.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(JSONRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,47 @@
+"""Compiled, immutable copies of a poll's questions and choices.
+
+Submissions of a poll are validated against its schema, which is cached per
+process and rebuilt once the poll's version moved on.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from .cache import poll_schemas
+from .models import Question
+
+PollSchema = namedtuple('PollSchema', ['poll_id', 'version', 'question_ids', 'questions'])
+QuestionSchema = namedtuple('QuestionSchema', ['id', 'question_type', 'choices', 'choice_texts'])
+ChoiceSchema = namedtuple('ChoiceSchema', ['id', 'text'])
+
+
+def compile_question(question_id, question_type, choices):
+    return QuestionSchema(
+        question_id, question_type, tuple(choices),
+        frozenset(choice.text for choice in choices)
+    )
+
+
+def compile_schema(poll):
+    rows = Question.objects.filter(poll_id=poll.id).order_by('id', 'choices__id').values_list(
+        'id', 'question_type', 'choices__id', 'choices__text'
+    )
+    types, choices = {}, {}
+    for question_id, question_type, choice_id, text in rows:
+        types[question_id] = question_type
+        question_choices = choices.setdefault(question_id, [])
+        if choice_id is not None:
+            question_choices.append(ChoiceSchema(choice_id, text))
+    questions = {
+        question_id: compile_question(question_id, question_type, choices[question_id])
+        for question_id, question_type in types.items()
+    }
+    return PollSchema(poll.id, poll.version, tuple(questions), MappingProxyType(questions))
+
+
+def get_schema(poll):
+    """Schema of ``poll`` at its loaded version, without queries once cached."""
+    schema = poll_schemas.get(poll.id)
+    if schema is None or schema.version != poll.version:
+        schema = compile_schema(poll)
+        poll_schemas.set(poll.id, schema)
+    return schema
@@ -1,7 +1,16 @@
 from datetime import datetime
 
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Poll, Question, Choice, Answer, PollAnswer
+from .ingest import Submission, SubmittedAnswer
+from .metrics import TimedSerializerMixin
+from . import ingest, readpath, schema, tallies
+
+
+class ModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    pass
 
 
 class QuestionField(serializers.RelatedField):
@@ -14,7 +23,7 @@ class QuestionField(serializers.RelatedField):
         return question_data
 
 
-class PollSerializer(serializers.ModelSerializer):
+class PollSerializer(ModelSerializer):
 
     class Meta:
         model = Poll
@@ -41,7 +50,7 @@ class ChoiceField(serializers.RelatedField):
         return choice_data
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(ModelSerializer):
     choices = ChoiceField(many=True, read_only=True)
 
     class Meta:
@@ -49,7 +58,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'poll', 'question_type', 'text', 'choices']
 
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class ChoiceSerializer(ModelSerializer):
     class Meta:
         model = Choice
         fields = ['id', 'question', 'text']
@@ -67,7 +76,57 @@ class ChoiceSerializer(serializers.ModelSerializer):
         return choice
 
 
-class ActivePollSerializer(serializers.ModelSerializer):
+class BulkChoiceSerializer(ModelSerializer):
+    class Meta:
+        model = Choice
+        fields = ['id', 'text']
+
+
+class BulkQuestionSerializer(ModelSerializer):
+    choices = BulkChoiceSerializer(many=True, required=False)
+
+    class Meta:
+        model = Question
+        fields = ['id', 'question_type', 'text', 'choices']
+
+    def validate(self, data):
+        if data.get('choices') and data['question_type'] not in Question.QUESTION_CHOICE_TYPES:
+            raise serializers.ValidationError(
+                {'choices': "Question must have 'choice' or 'multiple choice' type, not 'text'."}
+            )
+        return data
+
+
+class PollBulkSerializer(PollSerializer):
+    questions = BulkQuestionSerializer(many=True)
+
+    class Meta(PollSerializer.Meta):
+        fields = PollSerializer.Meta.fields + ['questions']
+
+    @transaction.atomic
+    def create(self, validated_data):
+        questions_data = validated_data.pop('questions')
+        poll = Poll.objects.create(**validated_data)
+        questions = Question.objects.bulk_create([
+            Question(poll=poll, question_type=data['question_type'], text=data['text'])
+            for data in questions_data
+        ])
+        if any(question.pk is None for question in questions):
+            # Backends that can't return ids from a bulk insert (SQLite),
+            # ids follow the insert order.
+            questions = list(Question.objects.filter(poll=poll).order_by('id'))
+        Choice.objects.bulk_create([
+            Choice(question=question, text=choice['text'])
+            for question, data in zip(questions, questions_data)
+            for choice in data.get('choices', [])
+        ])
+        return Poll.objects.prefetch_related(
+            Prefetch('questions', queryset=Question.objects.order_by('id')),
+            Prefetch('questions__choices', queryset=Choice.objects.order_by('id')),
+        ).get(pk=poll.pk)
+
+
+class ActivePollSerializer(ModelSerializer):
     questions = QuestionSerializer(many=True)
 
     class Meta:
@@ -75,43 +134,78 @@ class ActivePollSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'date_finish', 'questions']
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+def submitting_user_id(context):
+    # Imported submissions name their user, see polls.imports.
+    if 'user_id' in context:
+        return context['user_id']
+    user = None
+    request = context.get("request")
+    if request and hasattr(request, "user"):
+        user = request.user
+    return user.id
+
+
+class SubmittedPollField(serializers.PrimaryKeyRelatedField):
+
+    def to_internal_value(self, data):
+        poll = self.context.get('poll')
+        try:
+            if poll is not None and poll.pk == int(data):
+                return poll
+        except (TypeError, ValueError):
+            pass
+        return super().to_internal_value(data)
+
+
+class PollQuestionField(serializers.PrimaryKeyRelatedField):
+
+    def to_internal_value(self, data):
+        poll_schema = self.context.get('poll_schema')
+        try:
+            return poll_schema.questions[int(data)]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            pass
+        # A question of another poll, rejected by PollAnswerSerializer.validate.
+        if self.context.get('schema_only'):
+            try:
+                return schema.compile_question(int(data), Question.TEXT, [])
+            except (TypeError, ValueError):
+                self.fail('incorrect_type', data_type=type(data).__name__)
+        question = super().to_internal_value(data)
+        return schema.compile_question(
+            question.id, question.question_type,
+            [schema.ChoiceSchema(choice.id, choice.text) for choice in question.choices.order_by('id')]
+        )
+
+
+class AnswerSerializer(ModelSerializer):
+    question = PollQuestionField(queryset=Question.objects.all())
 
     class Meta:
         model = Answer
         fields = ['id', 'question', 'answer']
 
     def validate(self, data):
-        user = None
-        request = self.context.get("request")
-        if request and hasattr(request, "user"):
-            user = request.user
-        data['user_id'] = user.id
+        data['user_id'] = submitting_user_id(self.context)
         question = data.get('question')
         text = data.get('answer')
         if question.question_type == 'text':
             return data
         else:
-            try:
-                question_choices = [
-                    choice.text for choice in Choice.objects.filter(question=question)
-                ]
-                choices = text.split(';')
-                if not set(question_choices) & set(choices):
-                    raise serializers.ValidationError(
-                        {f'question {question.id}, choices': "Answer must contain choice."}
-                    )
-                if question.question_type == 'choice' and len(choices) > 1:
-                    raise serializers.ValidationError(
-                        {f'question {question.id}, choices': "Answer must contain only one choice."}
-                    )
-            except serializers.ValidationError as err:
-                raise err
+            choices = text.split(';')
+            if question.choice_texts.isdisjoint(choices):
+                raise serializers.ValidationError(
+                    {f'question {question.id}, choices': "Answer must contain choice."}
+                )
+            if question.question_type == 'choice' and len(choices) > 1:
+                raise serializers.ValidationError(
+                    {f'question {question.id}, choices': "Answer must contain only one choice."}
+                )
         return data
 
     def create(self, validated_data):
         question = validated_data.pop('question')
-        answer = Answer.objects.create(question=question, **validated_data)
+        answer = Answer.objects.create(question_id=question.id, **validated_data)
         return answer
 
 
@@ -128,7 +222,7 @@ class AnswerField(serializers.RelatedField):
             return ''
 
 
-class AnswerDoneSerializer(serializers.ModelSerializer):
+class AnswerDoneSerializer(ModelSerializer):
     question = QuestionField(read_only=True)
 
     class Meta:
@@ -147,7 +241,7 @@ class PollField(serializers.RelatedField):
         return poll_data
 
 
-class PollDoneSerializer(serializers.ModelSerializer):
+class PollDoneSerializer(ModelSerializer):
     poll = PollField(read_only=True)
     answers = AnswerDoneSerializer(many=True, read_only=True)
 
@@ -156,7 +250,8 @@ class PollDoneSerializer(serializers.ModelSerializer):
         fields = ['poll', 'answers']
 
 
-class PollAnswerSerializer(serializers.ModelSerializer):
+class PollAnswerSerializer(ModelSerializer):
+    poll = SubmittedPollField(queryset=Poll.objects.all())
     answers = AnswerSerializer(many=True)
 
     class Meta:
@@ -170,13 +265,25 @@ class PollAnswerSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def to_internal_value(self, data):
+        # Questions and choices come from the poll's compiled schema, the
+        # nested answer fields and validators only look them up here. With
+        # ``schema_only`` the poll and its schema are given in the context and
+        # no queries are made.
+        if not self.context.get('schema_only'):
+            poll_id = data.get('poll') if hasattr(data, 'get') else None
+            try:
+                poll = Poll.objects.get(pk=int(poll_id))
+            except (TypeError, ValueError, Poll.DoesNotExist):
+                poll = None
+            self.context['poll'] = poll
+            self.context['poll_schema'] = schema.get_schema(poll) if poll is not None else None
+        return super().to_internal_value(data)
+
     def validate(self, data):
-        user = None
-        request = self.context.get("request")
-        if request and hasattr(request, "user"):
-            user = request.user
-        data['user_id'] = user.id
-        questions = [question.id for question in Question.objects.filter(poll=data['poll'])]
+        data['user_id'] = submitting_user_id(self.context)
+        poll_schema = self.context['poll_schema']
+        questions = list(poll_schema.question_ids) if poll_schema is not None else []
         data_questions = [answer['question'].id for answer in data['answers']]
         if questions != data_questions:
             raise serializers.ValidationError(
@@ -184,9 +291,54 @@ class PollAnswerSerializer(serializers.ModelSerializer):
             )
         return data
 
+    def get_submission(self, validated_data):
+        answers = []
+        for answer in validated_data['answers']:
+            question = answer['question']
+            choice_ids = []
+            if question.question_type in Question.QUESTION_CHOICE_TYPES:
+                choice_ids = tallies.selected_choice_ids(answer['answer'], question.choices)
+            answers.append(SubmittedAnswer(question.id, answer['answer'], choice_ids))
+        return Submission(validated_data['poll'].id, validated_data['user_id'], answers)
+
     def create(self, validated_data):
-        answers = validated_data.pop('answers')
-        poll_answer = PollAnswer.objects.create(**validated_data)
-        for answer in answers:
-            Answer.objects.create(poll_answer=poll_answer, **answer)
+        poll_answer, = ingest.write([self.get_submission(validated_data)])
+        readpath.remember_completed_poll(poll_answer.user_id, poll_answer.poll_id)
         return poll_answer
+
+
+class ChoiceResultSerializer(ModelSerializer):
+    votes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Choice
+        fields = ['id', 'text', 'votes']
+
+    def get_votes(self, obj):
+        try:
+            return obj.tally.votes
+        except Choice.tally.RelatedObjectDoesNotExist:
+            return 0
+
+
+class QuestionResultSerializer(ModelSerializer):
+    responses = serializers.SerializerMethodField()
+    choices = ChoiceResultSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Question
+        fields = ['id', 'question_type', 'text', 'responses', 'choices']
+
+    def get_responses(self, obj):
+        try:
+            return obj.tally.responses
+        except Question.tally.RelatedObjectDoesNotExist:
+            return 0
+
+
+class PollResultsSerializer(ModelSerializer):
+    questions = QuestionResultSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Poll
+        fields = ['id', 'name', 'description', 'date_start', 'date_finish', 'questions']
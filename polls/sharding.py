@@ -0,0 +1,113 @@
+"""Placement of answer rows on the answer databases.
+
+The ``PollAnswer``, ``Answer``, ``AnswerChoice`` and ``AnswerArchive`` rows
+of a poll are stored together in one of ``settings.ANSWER_DATABASES``, picked
+by rendezvous hashing of the poll id. Adding a database only moves the polls
+that now pick it.
+"""
+import heapq
+import zlib
+from itertools import chain, islice
+
+from django.conf import settings
+
+ANSWER_MODELS = ('pollanswer', 'answer', 'answerchoice', 'answerarchive')
+
+
+def answer_databases():
+    return list(settings.ANSWER_DATABASES)
+
+
+def is_sharded():
+    return answer_databases() != ['default']
+
+
+def is_answer_model(model):
+    return model._meta.app_label == 'polls' and model._meta.model_name in ANSWER_MODELS
+
+
+def database_for_poll(poll_id, databases=None):
+    if databases is None:
+        databases = settings.ANSWER_DATABASES
+    if len(databases) == 1:
+        return databases[0]
+    return max(
+        databases,
+        key=lambda alias: (zlib.crc32(f'{alias}:{poll_id}'.encode()), alias)
+    )
+
+
+def group_by_database(items, poll_id=lambda item: item.poll_id):
+    groups = {}
+    for item in items:
+        groups.setdefault(database_for_poll(poll_id(item)), []).append(item)
+    return groups
+
+
+def on_database(queryset, alias):
+    """``queryset`` on ``alias``, left to the routers while unsharded."""
+    if not is_sharded():
+        return queryset
+    return queryset.using(alias)
+
+
+def fan_out(queryset):
+    """Run ``queryset`` on every answer database.
+
+    Unsharded the queryset is returned as is, so the database routers still
+    decide where it's read from.
+    """
+    if not is_sharded():
+        return queryset
+    return FanOutQuery(
+        [queryset.using(alias) for alias in answer_databases()],
+        tuple(queryset.query.order_by)
+    )
+
+
+class FanOutQuery:
+    """Merges the ordered results of the same query on several databases.
+
+    Implements what ``CursorPagination`` needs from a queryset: ``order_by``
+    on fields of a single direction, ``filter`` and slicing.
+    """
+
+    def __init__(self, querysets, ordering=()):
+        self.querysets = querysets
+        self.ordering = ordering
+
+    def filter(self, *args, **kwargs):
+        return FanOutQuery(
+            [queryset.filter(*args, **kwargs) for queryset in self.querysets],
+            self.ordering
+        )
+
+    def order_by(self, *ordering):
+        return FanOutQuery(
+            [queryset.order_by(*ordering) for queryset in self.querysets],
+            ordering
+        )
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('FanOutQuery only supports slices without a step.')
+        parts = self.querysets
+        if key.stop is not None:
+            # A merged slice never takes more than ``stop`` rows of one database.
+            parts = [queryset[:key.stop] for queryset in parts]
+        if self.ordering:
+            rows = heapq.merge(
+                *parts, key=self._sort_key, reverse=self.ordering[0].startswith('-')
+            )
+        else:
+            rows = chain(*parts)
+        return list(islice(rows, key.start, key.stop))
+
+    def _sort_key(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return tuple(row[name] for name in names)
+        return tuple(getattr(row, name) for name in names)
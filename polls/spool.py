@@ -0,0 +1,100 @@
+import json
+import sqlite3
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .ingest import Submission, SubmittedAnswer
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    poll_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    answers TEXT NOT NULL,
+    created_at TEXT,
+    UNIQUE (poll_id, user_id)
+)
+'''
+
+
+class AnswerSpool:
+    """Durable local queue of validated submissions backed by a SQLite file.
+
+    A user can only have one pending submission per poll, appending it again
+    is a no-op, so client retries are acknowledged without new entries.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        connection.execute(SCHEMA)
+        columns = [row[1] for row in connection.execute('PRAGMA table_info(submissions)')]
+        if 'created_at' not in columns:
+            # Spool written before the submission times were kept, its
+            # entries are stamped when they are drained.
+            try:
+                connection.execute('ALTER TABLE submissions ADD COLUMN created_at TEXT')
+            except sqlite3.OperationalError:
+                # Added by another connection meanwhile.
+                pass
+        return connection
+
+    def append(self, submission):
+        answers = json.dumps([list(answer) for answer in submission.answers])
+        # Drained submissions keep the time they were accepted.
+        created_at = (submission.created_at or timezone.now()).isoformat()
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO submissions (poll_id, user_id, answers, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                (submission.poll_id, submission.user_id, answers, created_at)
+            )
+            return cursor.rowcount == 1
+        finally:
+            connection.close()
+
+    def read(self, limit):
+        """Return up to ``limit`` oldest entries as (entry id, Submission)."""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                'SELECT id, poll_id, user_id, answers, created_at FROM submissions '
+                'ORDER BY id LIMIT ?', (limit,)
+            ).fetchall()
+        finally:
+            connection.close()
+        return [
+            (pk, Submission(poll_id, user_id, [
+                SubmittedAnswer(*answer) for answer in json.loads(answers)
+            ], created_at and parse_datetime(created_at)))
+            for pk, poll_id, user_id, answers, created_at in rows
+        ]
+
+    def remove(self, ids):
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN')
+            connection.executemany(
+                'DELETE FROM submissions WHERE id = ?', [(pk,) for pk in ids]
+            )
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+    def __len__(self):
+        connection = self._connect()
+        try:
+            return connection.execute('SELECT COUNT(*) FROM submissions').fetchone()[0]
+        finally:
+            connection.close()
+
+
+def get_spool():
+    return AnswerSpool(settings.ANSWER_SPOOL_PATH)
@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Count
+
+from .models import Question, Choice, Answer, AnswerChoice, QuestionTally, \
+    ChoiceTally
+from . import archive, sharding
+
+
+def selected_choice_ids(text, choices):
+    """Map ';'-joined answer text to ids of the matching choices."""
+    by_text = {}
+    for choice in choices:
+        by_text.setdefault(choice.text, choice.id)
+    selected = []
+    for part in text.split(';'):
+        choice_id = by_text.get(part)
+        if choice_id is not None and choice_id not in selected:
+            selected.append(choice_id)
+    return selected
+
+
+def increment(question_ids, choice_ids):
+    """Add one to the counter of every id, repeated ids are counted again."""
+    # Counter rows are created lazily, so polls built before the tally
+    # tables existed (or through bulk inserts) are handled the same way.
+    _add(QuestionTally, 'question_id', 'responses', Counter(question_ids))
+    _add(ChoiceTally, 'choice_id', 'votes', Counter(choice_ids))
+
+
+def _add(model, key, field, counts):
+    if not counts:
+        return
+    model.objects.bulk_create(
+        [model(**{key: pk}) for pk in counts], ignore_conflicts=True
+    )
+    by_amount = {}
+    for pk, amount in counts.items():
+        by_amount.setdefault(amount, []).append(pk)
+    for amount, pks in by_amount.items():
+        model.objects.filter(**{f'{key}__in': pks}).update(**{field: F(field) + amount})
+
+
+def rebuild(poll=None):
+    questions = Question.objects.all()
+    if poll is not None:
+        questions = questions.filter(poll=poll)
+    choices = Choice.objects.filter(question__in=questions)
+
+    responses, votes = Counter(), Counter()
+    for alias in sharding.answer_databases():
+        answers = Answer.objects.using(alias)
+        answer_choices = AnswerChoice.objects.using(alias)
+        if poll is not None:
+            answers = answers.filter(poll_answer__poll_id=poll.id)
+            answer_choices = answer_choices.filter(answer__poll_answer__poll_id=poll.id)
+        responses.update(dict(
+            answers.values_list('question_id').annotate(count=Count('id')).order_by()
+        ))
+        votes.update(dict(
+            answer_choices.values_list('choice_id').annotate(count=Count('id')).order_by()
+        ))
+        archived_responses, archived_votes = archive.tallies(
+            alias, poll.id if poll is not None else None
+        )
+        responses.update(archived_responses)
+        votes.update(archived_votes)
+
+    with transaction.atomic():
+        QuestionTally.objects.filter(question__in=questions).delete()
+        ChoiceTally.objects.filter(choice__in=choices).delete()
+        QuestionTally.objects.bulk_create(
+            [QuestionTally(question_id=pk, responses=responses[pk])
+             for pk in questions.values_list('id', flat=True)]
+        )
+        ChoiceTally.objects.bulk_create(
+            [ChoiceTally(choice_id=pk, votes=votes[pk])
+             for pk in choices.values_list('id', flat=True)]
+        )
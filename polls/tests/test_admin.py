@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls import ingest
+from polls.admin import EstimatedCountPaginator
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import Poll, Question, Answer, PollAnswer
+
+TODAY = datetime.now().date()
+
+
+class AdminTest(TestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.question = Question.objects.create(
+            poll=self.poll, text='Text', question_type='text'
+        )
+        self.admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+        self.client.force_login(self.admin)
+
+    def submit(self, user_ids):
+        ingest.write([
+            Submission(self.poll.id, user_id, [SubmittedAnswer(self.question.id, 'Text', [])])
+            for user_id in user_ids
+        ])
+
+    def queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        self.submit(range(1, 4))
+        urls = [
+            reverse(f'admin:polls_{model}_changelist')
+            for model in ('poll', 'question', 'choice', 'pollanswer', 'answer')
+        ]
+        counts = [self.queries(url) for url in urls]
+        self.submit(range(4, 40))
+        self.assertEqual([self.queries(url) for url in urls], counts)
+
+    def test_counts_are_limited(self):
+        self.submit(range(1, 30))
+        paginator = EstimatedCountPaginator(PollAnswer.objects.order_by('id'), 10)
+        paginator.count_limit = 20
+        self.assertEqual(paginator.count, 20)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_poll_responses_are_paginated(self):
+        self.submit(range(1, 26))
+        url = reverse('admin:polls_poll_change', args=[self.poll.id])
+        response = self.client.get(url)
+        self.assertContains(response, '1 / 2')
+        self.assertContains(response, '?responses=2')
+        self.assertEqual(len(response.context['inline_admin_formsets'][1].formset.forms), 20)
+        response = self.client.get(url, {'responses': 2, '_changelist_filters': 'q=Test'})
+        self.assertContains(response, '2 / 2')
+        self.assertEqual(len(response.context['inline_admin_formsets'][1].formset.forms), 5)
+        self.assertContains(response, '?responses=1&amp;_changelist_filters=q%3DTest')
+
+        poll_answer = PollAnswer.objects.filter(poll=self.poll).first()
+        response = self.client.get(
+            reverse('admin:polls_answer_changelist'), {'poll_answer__id__exact': poll_answer.id}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_answered_poll_can_be_deleted(self):
+        self.submit([1, 2])
+        # Answers alone still can't be deleted.
+        poll_answer = PollAnswer.objects.first()
+        response = self.client.post(
+            reverse('admin:polls_pollanswer_delete', args=[poll_answer.id]), {'post': 'yes'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+        url = reverse('admin:polls_poll_delete', args=[self.poll.id])
+        response = self.client.get(url)
+        self.assertEqual(response.context['perms_lacking'], set())
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Poll.objects.exists())
+        self.assertFalse(PollAnswer.objects.exists())
+        self.assertFalse(Answer.objects.exists())
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls import analytics, ingest, tallies
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import Poll, Question, Choice
+
+TODAY = datetime.now().date()
+
+
+class CrosstabTest(APITestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.single = Question.objects.create(
+            poll=self.poll, text='Single', question_type='choice'
+        )
+        self.multiple = Question.objects.create(
+            poll=self.poll, text='Multiple', question_type='multiple choice'
+        )
+        self.text = Question.objects.create(
+            poll=self.poll, text='Text', question_type='text'
+        )
+        for text in ('Yes', 'No'):
+            Choice.objects.create(question=self.single, text=text)
+        for text in ('A', 'B', 'C'):
+            Choice.objects.create(question=self.multiple, text=text)
+        responses = [
+            ('Yes', 'A;B'),
+            ('Yes', 'A'),
+            ('No', 'B;C'),
+            ('Maybe', 'A;C'),
+        ]
+        ingest.write([
+            Submission(self.poll.id, user_id, [
+                self.answer(self.single, single),
+                self.answer(self.multiple, multiple),
+                SubmittedAnswer(self.text.id, 'Text', []),
+            ])
+            for user_id, (single, multiple) in enumerate(responses, 1)
+        ])
+        self.admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+
+    def answer(self, question, text):
+        choice_ids = tallies.selected_choice_ids(text, question.choices.all())
+        return SubmittedAnswer(question.id, text, choice_ids)
+
+    def test_choice_arrays(self):
+        data = analytics.load(self.poll)
+        self.assertEqual(set(data.questions), {self.single.id, self.multiple.id})
+        self.assertEqual(data.codes(self.single.id).tolist(), [0, 0, 1, -1])
+        self.assertEqual(data.responses(self.single.id), 4)
+        self.assertEqual(data.votes(self.multiple.id).tolist(), [3, 2, 2])
+        self.assertEqual(data.shares(self.single.id).tolist(), [0.5, 0.25])
+        self.assertEqual(
+            data.coselection(self.multiple.id).tolist(),
+            [[3, 1, 1], [1, 2, 1], [1, 1, 2]]
+        )
+
+    def test_crosstab(self):
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('polls-crosstab', kwargs={'pk': self.poll.id})
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                url, {'q1': self.single.id, 'q2': self.multiple.id}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['respondents'], 4)
+        self.assertEqual(
+            [choice['text'] for choice in response.json()['q2']['choices']], ['A', 'B', 'C']
+        )
+        self.assertEqual(response.json()['counts'], [[2, 1, 0], [0, 1, 1]])
+
+        response = self.client.get(url, {'q1': self.single.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            url, {'q1': self.single.id, 'q2': self.text.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_analyze_poll_command(self):
+        out = StringIO()
+        call_command('analyze_poll', self.poll.id, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['respondents'], 4)
+        single, multiple = report['questions']
+        self.assertEqual([choice['votes'] for choice in single['choices']], [2, 1])
+        self.assertNotIn('coselection', single)
+        self.assertEqual(multiple['coselection'][0], [3, 1, 1])
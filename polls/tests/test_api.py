@@ -1,10 +1,14 @@
+import json
 from datetime import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.test import APITestCase
-from polls.models import Poll, Question, Answer
+from polls.cache import poll_schemas
+from polls.models import Poll, Question, Choice, Answer, AnswerChoice, PollAnswer
 
 TODAY = datetime.now().date()
 OLD_DATE = datetime.strptime('2020-01-01', '%Y-%m-%d')
@@ -123,3 +127,438 @@ class AccountTests(APITestCase):
         self.client.login(username='user', password='123')
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_answer_updates_results(self):
+        poll = Poll.objects.get()
+        question = Question.objects.create(
+            poll=poll, text='Test question', question_type='multiple choice'
+        )
+        first = Choice.objects.create(question=question, text='First')
+        second = Choice.objects.create(question=question, text='Second')
+        data = {
+            "poll": poll.id,
+            'answers': [
+                {"question": question.id, "answer": "First;Second"}
+            ]
+        }
+        self.client.login(username='user', password='123')
+        response = self.client.post(reverse('answers-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(AnswerChoice.objects.values_list('choice_id', flat=True)),
+            [first.id, second.id]
+        )
+        self.client.logout()
+
+        self.client.login(username='admin', password='123')
+        url = reverse('polls-results', kwargs={'pk': poll.id})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.json()['questions'][0]
+        self.assertEqual(result['responses'], 1)
+        self.assertEqual(
+            result['choices'],
+            [
+                {'id': first.id, 'text': 'First', 'votes': 1},
+                {'id': second.id, 'text': 'Second', 'votes': 1},
+            ]
+        )
+
+    def test_moving_question_updates_both_polls(self):
+        old_poll = Poll.objects.get()
+        new_poll = Poll.objects.create(
+            name='Test2', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        kept = Question.objects.create(poll=old_poll, text='Kept', question_type='text')
+        moved = Question.objects.create(poll=old_poll, text='Moved', question_type='choice')
+        choice = Choice.objects.create(question=moved, text='Yes')
+        url = reverse('answers-create')
+        data = {'poll': old_poll.id, 'answers': [
+            {'question': kept.id, 'answer': 'Text'}, {'question': moved.id, 'answer': 'Yes'}
+        ]}
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        versions = dict(Poll.objects.values_list('id', 'version'))
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(
+            reverse('questions-detail', kwargs={'pk': moved.id}), {'poll': new_poll.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_versions = dict(Poll.objects.values_list('id', 'version'))
+        self.assertGreater(new_versions[old_poll.id], versions[old_poll.id])
+        self.assertGreater(new_versions[new_poll.id], versions[new_poll.id])
+
+        self.assertIsNone(poll_schemas.get(old_poll.id))
+        response = self.client.post(url, {
+            'poll': old_poll.id, 'answers': [{'question': kept.id, 'answer': 'Text'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(url, {
+            'poll': new_poll.id, 'answers': [{'question': moved.id, 'answer': 'Yes'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(poll_schemas.get(new_poll.id))
+
+        # Moving the choice to a question of the first poll.
+        old_question = Question.objects.create(poll=old_poll, text='Other', question_type='choice')
+        versions = dict(Poll.objects.values_list('id', 'version'))
+        response = self.client.patch(
+            reverse('choices-detail', kwargs={'pk': choice.id}),
+            {'question': old_question.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_versions = dict(Poll.objects.values_list('id', 'version'))
+        self.assertGreater(new_versions[old_poll.id], versions[old_poll.id])
+        self.assertGreater(new_versions[new_poll.id], versions[new_poll.id])
+        self.assertIsNone(poll_schemas.get(new_poll.id))
+
+    def test_answer_validation_uses_cached_poll_schema(self):
+        poll = Poll.objects.get()
+        question = Question.objects.create(
+            poll=poll, text='Test question', question_type='choice'
+        )
+        Choice.objects.create(question=question, text='Yes')
+        url = reverse('answers-create')
+        data = {'poll': poll.id, 'answers': [{'question': question.id, 'answer': 'Yes'}]}
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('"polls_question"', tables)
+        self.assertNotIn('"polls_choice"', tables)
+
+        Choice.objects.create(question=question, text='No')
+        data['answers'][0]['answer'] = 'No'
+        self.client.force_authenticate(user=User.objects.create_user('other', 'other@test.com', '123'))
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_user_get_results(self):
+        poll = Poll.objects.get()
+        url = reverse('polls-results', kwargs={'pk': poll.id})
+        self.client.login(username='user', password='123')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_answer_query_count_does_not_grow(self):
+        url = reverse('answers-create')
+        counts = []
+        for size in (2, 6):
+            poll = Poll.objects.create(
+                name=f'Poll {size}', description='Text of description',
+                date_start=TODAY, date_finish=TODAY
+            )
+            answers = []
+            for i in range(size):
+                question = Question.objects.create(
+                    poll=poll, text=f'Question {i}', question_type='choice'
+                )
+                Choice.objects.create(question=question, text='Yes')
+                Choice.objects.create(question=question, text='No')
+                answers.append({"question": question.id, "answer": "Yes"})
+            self.client.force_authenticate(user=self.user)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    url, {"poll": poll.id, "answers": answers}, format='json'
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Answer.objects.count(), 8)
+
+    def test_active_polls_snapshot(self):
+        url = reverse('polls-active')
+        poll = Poll.objects.get()
+        question = Question.objects.create(
+            poll=poll, text='Test question', question_type='choice'
+        )
+        Choice.objects.create(question=question, text='Yes')
+        self.client.force_authenticate(user=self.user)
+        self.client.get(url, format='json')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
+        self.assertEqual(
+            response.json()[0]['questions'][0]['choices'],
+            [{'id': 1, 'text': 'Yes'}]
+        )
+        Choice.objects.create(question=question, text='No')
+        response = self.client.get(url, format='json')
+        self.assertEqual(len(response.json()[0]['questions'][0]['choices']), 2)
+
+    def test_active_polls_query_count(self):
+        url = reverse('polls-active')
+        poll = Poll.objects.get()
+        for i in range(3):
+            question = Question.objects.create(
+                poll=poll, text=f'Question {i}', question_type='choice'
+            )
+            Choice.objects.create(question=question, text='Yes')
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(4):
+            self.client.get(url, format='json')
+
+    def test_active_polls_unanswered(self):
+        url = reverse('polls-active')
+        answered = Poll.objects.get()
+        question = Question.objects.create(
+            poll=answered, text='Test question', question_type='text'
+        )
+        unanswered = Poll.objects.create(
+            name='Test2', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.client.force_authenticate(user=self.user)
+        data = {'poll': answered.id, 'answers': [{'question': question.id, 'answer': 'Answer'}]}
+        response = self.client.post(reverse('answers-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(url, format='json')
+        self.assertEqual(len(response.json()), 2)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'unanswered': 1}, format='json')
+        self.assertEqual([poll['id'] for poll in response.json()], [unanswered.id])
+        etag = response['ETag']
+        response = self.client.get(
+            url, {'unanswered': 1}, format='json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(
+            url, {'unanswered': 1}, format='json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_user_get_done_polls_list(self):
+        url = reverse('polls-done')
+        question_ids = []
+        for i in range(3):
+            poll = Poll.objects.create(
+                name=f'Poll {i}', description='Text of description',
+                date_start=TODAY, date_finish=TODAY
+            )
+            question = Question.objects.create(
+                poll=poll, text=f'Question {i}', question_type='text'
+            )
+            question_ids.append(question.id)
+            poll_answer = PollAnswer.objects.create(poll=poll, user_id=self.user.id)
+            Answer.objects.create(
+                poll_answer=poll_answer, question=question,
+                user_id=self.user.id, answer=f'Answer {i}'
+            )
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'page_size': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page = response.json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertEqual(
+            page['results'][0]['answers'],
+            [{
+                'question': {
+                    'id': question_ids[0], 'question_type': 'text', 'text': 'Question 0'
+                },
+                'answer': 'Answer 0'
+            }]
+        )
+        response = self.client.get(page['next'], format='json')
+        page = response.json()
+        self.assertEqual([item['poll']['name'] for item in page['results']], ['Poll 2'])
+        self.assertIsNone(page['next'])
+
+    def test_admin_get_choices_list_paginated_and_filtered(self):
+        poll = Poll.objects.get()
+        first = Question.objects.create(poll=poll, text='First', question_type='choice')
+        second = Question.objects.create(poll=poll, text='Second', question_type='choice')
+        for i in range(3):
+            Choice.objects.create(question=first, text=f'First {i}')
+            Choice.objects.create(question=second, text=f'Second {i}')
+        url = reverse('choices-list')
+        self.client.login(username='admin', password='123')
+
+        response = self.client.get(url, format='json')
+        self.assertEqual(len(response.json()), 6)
+
+        response = self.client.get(
+            url, {'question': second.id, 'page_size': 2}, format='json'
+        )
+        page = response.json()
+        self.assertEqual(
+            [choice['text'] for choice in page['results']], ['Second 0', 'Second 1']
+        )
+        page = self.client.get(page['next'], format='json').json()
+        self.assertEqual([choice['text'] for choice in page['results']], ['Second 2'])
+        self.assertIsNone(page['next'])
+
+        response = self.client.get(url, {'question': 'abc'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_answer_poll_twice(self):
+        url = reverse('answers-create')
+        poll = Poll.objects.get()
+        question = Question.objects.create(
+            poll=poll, text='Test question', question_type='text'
+        )
+        data = {
+            "poll": poll.id,
+            'answers': [
+                {"question": question.id, "answer": "Answer"}
+            ]
+        }
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(1):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(PollAnswer.objects.count(), 1)
+
+    def test_admin_export_poll(self):
+        poll = Poll.objects.get()
+        first = Question.objects.create(poll=poll, text='First', question_type='text')
+        second = Question.objects.create(poll=poll, text='Second', question_type='text')
+        for user_id in (7, 8):
+            poll_answer = PollAnswer.objects.create(poll=poll, user_id=user_id)
+            for question in (second, first):
+                Answer.objects.create(
+                    poll_answer=poll_answer, question=question,
+                    user_id=user_id, answer=f'{question.text} {user_id}'
+                )
+        url = reverse('polls-export', kwargs={'pk': poll.id})
+        self.client.login(username='admin', password='123')
+
+        response = self.client.get(url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode().splitlines(),
+            ['id,user_id,First,Second', '1,7,First 7,Second 7', '2,8,First 8,Second 8']
+        )
+
+        response = self.client.get(url, {'format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            json.loads(lines[1]),
+            {'id': 2, 'user_id': 8, 'answers': {
+                str(first.id): 'First 8', str(second.id): 'Second 8'
+            }}
+        )
+
+        response = self.client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_active_polls_conditional_get(self):
+        url = reverse('polls-active')
+        poll = Poll.objects.get()
+        question = Question.objects.create(
+            poll=poll, text='Test question', question_type='choice'
+        )
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(url, format='json')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Choice.objects.create(question=question, text='Yes')
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_poll_detail_conditional_get(self):
+        poll = Poll.objects.get()
+        url = reverse('polls-detail', kwargs={'pk': poll.id})
+        self.client.force_authenticate(user=self.admin)
+        etag = self.client.get(url, format='json')['ETag']
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        poll.name = 'Renamed'
+        poll.save()
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['name'], 'Renamed')
+
+    def test_admin_bulk_create_poll(self):
+        url = reverse('polls-bulk')
+        data = {
+            'name': 'Survey',
+            'description': 'Text of description',
+            'date_start': f'{TODAY}',
+            'date_finish': f'{TODAY}',
+            'questions': [
+                {'question_type': 'text', 'text': 'First'},
+                {'question_type': 'choice', 'text': 'Second', 'choices': [
+                    {'text': 'Yes'}, {'text': 'No'}
+                ]},
+                {'question_type': 'multiple choice', 'text': 'Third', 'choices': [
+                    {'text': 'A'}, {'text': 'B'}, {'text': 'C'}
+                ]},
+            ]
+        }
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(9):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        poll = Poll.objects.get(name='Survey')
+        self.assertEqual(response.json()['id'], poll.id)
+        self.assertEqual(
+            [(q.text, [c.text for c in q.choices.order_by('id')])
+             for q in poll.questions.order_by('id')],
+            [('First', []), ('Second', ['Yes', 'No']), ('Third', ['A', 'B', 'C'])]
+        )
+        self.assertEqual(
+            [c['text'] for c in response.json()['questions'][2]['choices']], ['A', 'B', 'C']
+        )
+
+    def test_bulk_create_poll_rejects_choices_for_text_question(self):
+        data = {
+            'name': 'Survey',
+            'description': 'Text of description',
+            'date_start': f'{TODAY}',
+            'date_finish': f'{TODAY}',
+            'questions': [
+                {'question_type': 'text', 'text': 'First', 'choices': [{'text': 'Yes'}]},
+            ]
+        }
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse('polls-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Poll.objects.count(), 1)
+
+    def test_admin_replace_question_choices(self):
+        poll = Poll.objects.get()
+        question = Question.objects.create(poll=poll, text='Question', question_type='choice')
+        Choice.objects.create(question=question, text='Old')
+        version = Poll.objects.get().version
+        url = reverse('questions-choices', kwargs={'pk': question.id})
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.put(url, [{'text': 'Yes'}, {'text': 'No'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['text'] for c in response.json()], ['Yes', 'No'])
+        self.assertEqual(
+            list(question.choices.order_by('id').values_list('text', flat=True)), ['Yes', 'No']
+        )
+        self.assertGreater(Poll.objects.get().version, version)
+
+    def test_admin_cannot_replace_answered_question_choices(self):
+        poll = Poll.objects.get()
+        question = Question.objects.create(poll=poll, text='Question', question_type='choice')
+        choice = Choice.objects.create(question=question, text='Yes')
+        data = {'poll': poll.id, 'answers': [{'question': question.id, 'answer': 'Yes'}]}
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('answers-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        url = reverse('questions-choices', kwargs={'pk': question.id})
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.put(url, [{'text': 'Yes'}, {'text': 'No'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(list(question.choices.all()), [choice])
+        self.assertEqual(AnswerChoice.objects.get().choice_id, choice.id)
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from polls import archive, ingest, tallies
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import Poll, Question, Choice, Answer, AnswerChoice, \
+    AnswerArchive, PollAnswer
+
+TODAY = datetime.now().date()
+
+
+class ArchivePollsTest(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(f'user{i}', 'myemail@test.com', '123') for i in range(5)
+        ]
+        self.admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+        self.old = self.create_poll('Old', TODAY - timedelta(days=40))
+        self.recent = self.create_poll('Recent', TODAY - timedelta(days=1))
+        for poll in (self.old, self.recent):
+            single, multiple, text = poll.questions.order_by('id')
+            ingest.write([
+                Submission(poll.id, user.id, [
+                    self.answer(single, 'Yes' if i % 2 else 'No'),
+                    self.answer(multiple, 'A;B' if i % 3 else 'C'),
+                    SubmittedAnswer(text.id, f'Text {i}', []),
+                ])
+                for i, user in enumerate(self.users)
+            ])
+
+    def create_poll(self, name, date_finish):
+        poll = Poll.objects.create(
+            name=name, description='Text of description',
+            date_start=date_finish - timedelta(days=10), date_finish=date_finish
+        )
+        single = Question.objects.create(poll=poll, text='Single', question_type='choice')
+        multiple = Question.objects.create(
+            poll=poll, text='Multiple', question_type='multiple choice'
+        )
+        Question.objects.create(poll=poll, text='Text', question_type='text')
+        for text in ('Yes', 'No'):
+            Choice.objects.create(question=single, text=text)
+        for text in ('A', 'B', 'C'):
+            Choice.objects.create(question=multiple, text=text)
+        return poll
+
+    def answer(self, question, text):
+        choice_ids = tallies.selected_choice_ids(text, question.choices.all())
+        return SubmittedAnswer(question.id, text, choice_ids)
+
+    def responses(self):
+        """Everything that is read from the answers of the old poll."""
+        self.client.force_authenticate(user=self.admin)
+        pk = self.old.id
+        results = self.client.get(reverse('polls-results', kwargs={'pk': pk})).json()
+        single, multiple, _ = self.old.questions.order_by('id')
+        crosstab = self.client.get(
+            reverse('polls-crosstab', kwargs={'pk': pk}), {'q1': single.id, 'q2': multiple.id}
+        ).json()
+        export = b''.join(self.client.get(
+            reverse('polls-export', kwargs={'pk': pk}), HTTP_ACCEPT='application/x-ndjson'
+        ).streaming_content)
+        done = []
+        for user in self.users:
+            self.client.force_authenticate(user=user)
+            done.append(self.client.get(reverse('polls-done'), format='json').json())
+        return results, crosstab, export, done
+
+    def test_archived_answers_are_read_transparently(self):
+        before = self.responses()
+        out = StringIO()
+        call_command('archive_polls', days=30, batch_size=2, stdout=out)
+        self.assertIn('Archived 5 submissions.', out.getvalue())
+
+        self.assertEqual(AnswerArchive.objects.filter(poll=self.old).count(), 3)
+        self.assertFalse(Answer.objects.filter(poll_answer__poll=self.old).exists())
+        self.assertFalse(AnswerChoice.objects.filter(answer__poll_answer__poll=self.old).exists())
+        self.assertEqual(PollAnswer.objects.filter(poll=self.old).count(), 5)
+        self.assertEqual(Answer.objects.filter(poll_answer__poll=self.recent).count(), 15)
+        self.assertEqual(self.responses(), before)
+
+        call_command('rebuild_tallies', stdout=StringIO())
+        self.assertEqual(self.responses(), before)
+
+    def test_dry_run_and_blocks(self):
+        out = StringIO()
+        call_command('archive_polls', days=0, dry_run=True, stdout=out)
+        self.assertIn('Would archive 10 submissions.', out.getvalue())
+        self.assertFalse(AnswerArchive.objects.exists())
+
+        self.assertEqual(archive.archive_poll(self.old.id), 5)
+        self.assertEqual(archive.archive_poll(self.old.id), 0)
+        block = AnswerArchive.objects.get(poll=self.old)
+        self.assertEqual((block.first_user_id, block.last_user_id), (self.users[0].id, self.users[-1].id))
+        answers = archive.unpack(block.data)
+        self.assertEqual(len(answers), 15)
+        self.assertEqual(answers[1].answer, 'C')
+        self.assertEqual(len(answers[1].choice_ids), 1)
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls.authentication import user_cache, revoke_tokens, clear_revocations
+from polls.models import Poll
+
+TODAY = datetime.now().date()
+
+
+class SignedTokenAuthenticationTest(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        clear_revocations()
+        Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.user = User.objects.create_user('user', 'myemail@test.com', '123')
+
+    def obtain_token(self):
+        response = self.client.post(
+            reverse('token-obtain'), {'username': 'user', 'password': '123'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()['token']
+
+    def test_token_authenticates_without_queries(self):
+        token = self.obtain_token()
+        url = reverse('polls-active')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Only the poll version lookup of the cached active list is left.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_wrong_password(self):
+        response = self.client.post(
+            reverse('token-obtain'), {'username': 'user', 'password': 'wrong'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer 2:abc:1xIW1Y:forged')
+        response = self.client.get(reverse('polls-active'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_token(self):
+        token = self.obtain_token()
+        self.user.set_password('456')
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get(reverse('polls-active'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_token(self):
+        token = self.obtain_token()
+        revoke_tokens(self.user.id)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get(reverse('polls-active'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,159 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls import db_routers
+from polls.models import Poll, Question
+
+TODAY = datetime.now().date()
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+@mock.patch.object(db_routers, 'is_primary_copy', return_value=False)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def tearDown(self):
+        db_routers.stop_replica_reads()
+
+    def test_replica_mirroring_the_primary_is_skipped(self, is_primary_copy):
+        is_primary_copy.return_value = True
+        db_routers.start_replica_reads()
+        self.assertEqual(Poll.objects.all().db, 'default')
+
+    def test_reads_go_to_primary_by_default(self, is_primary_copy):
+        self.assertEqual(Poll.objects.all().db, 'default')
+
+    def test_replica_reads(self, is_primary_copy):
+        db_routers.start_replica_reads()
+        self.assertEqual(Poll.objects.all().db, 'replica1')
+        self.assertEqual(
+            db_routers.PrimaryReplicaRouter().db_for_write(Poll), 'default'
+        )
+        db_routers.stop_replica_reads()
+        self.assertEqual(Poll.objects.all().db, 'default')
+
+    def test_replicas_are_not_migrated(self, is_primary_copy):
+        router = db_routers.PrimaryReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica1', 'polls'))
+        self.assertIsNone(router.allow_migrate('default', 'polls'))
+
+
+class ReplicaReadMixinTest(APITestCase):
+    def setUp(self):
+        db_routers.clear_pins()
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.question = Question.objects.create(
+            poll=self.poll, text='Test question', question_type='text'
+        )
+        self.user = User.objects.create_user('user', 'myemail@test.com', '123')
+        self.client.force_authenticate(user=self.user)
+
+    def get_active(self):
+        with mock.patch.object(
+                db_routers, 'start_replica_reads',
+                wraps=db_routers.start_replica_reads) as start:
+            response = self.client.get(reverse('polls-active'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return start.called
+
+    def test_active_polls_read_from_replica(self):
+        self.assertTrue(self.get_active())
+
+    def test_reads_pinned_to_primary_after_submission(self):
+        data = {
+            'poll': self.poll.id,
+            'answers': [{'question': self.question.id, 'answer': 'Answer'}]
+        }
+        response = self.client.post(reverse('answers-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(db_routers.PIN_COOKIE, response.cookies)
+        self.assertFalse(self.get_active())
+
+
+@override_settings(REPLICA_DATABASES=['replica_a'])
+class ReplicaDatabaseTest(APITestCase):
+    databases = {'default', 'replica_a'}
+
+    @classmethod
+    def setUpClass(cls):
+        # A database of its own, the replica can tell its reads apart.
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases['replica_a'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory.name, 'replica_a.sqlite3'),
+        }
+        # Replicas aren't migrated while they are listed as such.
+        with override_settings(REPLICA_DATABASES=[]):
+            call_command('migrate', 'polls', database='replica_a', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica_a'].close()
+        del connections['replica_a']
+        del connections.databases['replica_a']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        db_routers.clear_pins()
+        self.poll = Poll.objects.create(
+            name='Primary', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.question = Question.objects.create(
+            poll=self.poll, text='Test question', question_type='text'
+        )
+        Poll.objects.using('replica_a').create(
+            name='Replica', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+        self.client.force_authenticate(user=self.admin)
+
+    def list_polls(self):
+        response = self.client.get(reverse('polls-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [poll['name'] for poll in response.json()]
+
+    def test_list_reads_from_replica(self):
+        self.assertEqual(self.list_polls(), ['Replica'])
+
+    def test_writes_go_to_primary(self):
+        data = {
+            'name': 'New', 'description': 'Text of description',
+            'date_start': f'{TODAY}', 'date_finish': f'{TODAY}'
+        }
+        response = self.client.post(reverse('polls-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Poll.objects.using('default').values_list('name', flat=True)),
+            ['Primary', 'New']
+        )
+        self.assertEqual(
+            list(Poll.objects.using('replica_a').values_list('name', flat=True)), ['Replica']
+        )
+
+    def test_pinned_reads_go_to_primary(self):
+        data = {
+            'poll': self.poll.id,
+            'answers': [{'question': self.question.id, 'answer': 'Answer'}]
+        }
+        response = self.client.post(reverse('answers-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.list_polls(), ['Primary'])
+        # Clients without the cookie are pinned in process.
+        self.client.cookies.clear()
+        self.assertEqual(self.list_polls(), ['Primary'])
+        db_routers.clear_pins()
+        self.assertEqual(self.list_polls(), ['Replica'])
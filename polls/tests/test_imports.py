@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from polls import ingest
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import Poll, Question, Choice, PollAnswer, QuestionTally
+
+TODAY = datetime.now().date()
+
+
+class ImportAnswersTest(TestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.choice = Question.objects.create(
+            poll=self.poll, text='Choice', question_type='choice'
+        )
+        self.text = Question.objects.create(poll=self.poll, text='Text', question_type='text')
+        Choice.objects.create(question=self.choice, text='Yes')
+        Choice.objects.create(question=self.choice, text='No')
+        ingest.write([Submission(self.poll.id, 100, [
+            SubmittedAnswer(self.choice.id, 'Yes', []), SubmittedAnswer(self.text.id, 'Text', []),
+        ])])
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'answers.ndjson')
+
+    def record(self, user_id, choice='Yes', **fields):
+        record = {
+            'user_id': user_id,
+            'poll': self.poll.id,
+            'answers': [
+                {'question': self.choice.id, 'answer': choice},
+                {'question': self.text.id, 'answer': 'Text'},
+            ],
+        }
+        record.update(fields)
+        return json.dumps(record)
+
+    def run_import(self, lines, **options):
+        with open(self.path, 'w') as source:
+            source.write('\n'.join(lines) + '\n')
+        out = StringIO()
+        call_command('import_answers', self.path, stdout=out, **options)
+        with open(self.path + '.rejects') as rejects:
+            return out.getvalue(), [json.loads(line) for line in rejects]
+
+    def test_valid_and_rejected_records(self):
+        lines = [
+            self.record(1, created_at='2026-10-01T10:00:00'),
+            '{"user_id": 2,',
+            self.record(3, choice='Maybe'),
+            self.record(4, answers=[{'question': self.text.id, 'answer': 'Text'}]),
+            self.record(5, poll=self.poll.id + 100),
+            self.record(6),
+            self.record(6, choice='No'),
+            self.record(100),
+            self.record('seven'),
+        ]
+        out, rejects = self.run_import(lines, workers=0, chunk_size=4)
+        self.assertIn('Imported 2 submissions, rejected 7', out)
+        self.assertEqual([reject['line'] for reject in rejects], [2, 3, 4, 5, 7, 8, 9])
+        self.assertEqual(rejects[1]['errors'], {'answers': [
+            {f'question {self.choice.id}, choices': ['Answer must contain choice.']}, {}
+        ]})
+        self.assertEqual(rejects[2]['errors'], {
+            'answers': ['Poll must contain answers for all questions.']
+        })
+        self.assertEqual(rejects[3]['errors'], {
+            'poll': [f'Invalid pk "{self.poll.id + 100}" - object does not exist.']
+        })
+        self.assertEqual(rejects[4]['errors'], {'poll': ['Poll has already been answered.']})
+        self.assertEqual(rejects[4]['record'], lines[6])
+
+        self.assertEqual(
+            PollAnswer.objects.get(poll=self.poll, user_id=1).created_at,
+            datetime(2026, 10, 1, 10, tzinfo=timezone.utc)
+        )
+        self.assertTrue(PollAnswer.objects.filter(poll=self.poll, user_id=6).exists())
+        self.assertEqual(QuestionTally.objects.get(question=self.choice).responses, 3)
+
+    def test_validates_in_worker_processes(self):
+        lines = [self.record(user_id) for user_id in range(1, 51)]
+        lines[10] = self.record(11, choice='Yes;No')
+        out, rejects = self.run_import(lines, workers=2, chunk_size=7)
+        self.assertIn('Imported 49 submissions, rejected 1', out)
+        self.assertEqual(rejects[0]['line'], 11)
+        self.assertEqual(PollAnswer.objects.filter(poll=self.poll).count(), 50)
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls.metrics import registry
+from polls.models import Poll
+
+TODAY = datetime.now().date()
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        registry.clear()
+        Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+
+    def test_server_timing_header(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('polls-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        self.assertIn('sql;dur=', timing)
+        self.assertIn('desc="1 queries"', timing)
+        self.assertIn('serializer;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_endpoint(self):
+        self.client.force_authenticate(user=self.admin)
+        self.client.get(reverse('polls-list'), format='json')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('# TYPE polls_sql_queries histogram', body)
+        self.assertIn('polls_sql_queries_bucket{route="polls-list",le="1"} 1', body)
+        self.assertIn('polls_request_duration_seconds_count{route="polls-list"} 1', body)
+
+    def test_metrics_need_admin(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=User.objects.create_user('user', 'user@test.com', '123'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_streamed_queries_are_counted(self):
+        self.client.force_authenticate(user=self.admin)
+        poll = Poll.objects.get()
+        response = self.client.get(reverse('polls-export', kwargs={'pk': poll.id}), {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        view_queries = int(timing.split('desc="')[1].split(' ')[0])
+        self.assertEqual(registry.render().count('route="polls-export"'), 0)
+        b''.join(response.streaming_content)
+        body = registry.render()
+        streamed_queries = float(
+            body.split('polls_sql_queries_sum{route="polls-export"} ')[1].split()[0]
+        )
+        self.assertGreater(streamed_queries, view_queries)
+        self.assertIn('polls_request_duration_seconds_count{route="polls-export"} 1', body)
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+TODAY = datetime.now().date()
+
+
+class MigrationTestCase(TransactionTestCase):
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+
+class BackfillAnswerChoiceTest(MigrationTestCase):
+    migrate_from = [('polls', '0004_answerchoice')]
+    migrate_to = [('polls', '0005_backfill_answerchoice')]
+
+    def test_answers_get_their_choices(self):
+        Poll = self.apps.get_model('polls', 'Poll')
+        Question = self.apps.get_model('polls', 'Question')
+        Choice = self.apps.get_model('polls', 'Choice')
+        PollAnswer = self.apps.get_model('polls', 'PollAnswer')
+        Answer = self.apps.get_model('polls', 'Answer')
+        poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        single = Question.objects.create(poll=poll, text='Single', question_type='choice')
+        multiple = Question.objects.create(
+            poll=poll, text='Multiple', question_type='multiple choice'
+        )
+        text = Question.objects.create(poll=poll, text='Text', question_type='text')
+        yes = Choice.objects.create(question=single, text='Yes')
+        Choice.objects.create(question=single, text='No')
+        first = Choice.objects.create(question=multiple, text='First')
+        second = Choice.objects.create(question=multiple, text='Second')
+        poll_answer = PollAnswer.objects.create(poll=poll, user_id=1)
+        answers = {
+            name: Answer.objects.create(
+                poll_answer=poll_answer, question=question, user_id=1, answer=answer
+            ).id
+            for name, question, answer in [
+                ('single', single, 'Yes'),
+                ('multiple', multiple, 'First;Second'),
+                ('partly matched', multiple, 'First;Third'),
+                ('unmatched', single, 'Maybe'),
+                ('text', text, 'Yes'),
+            ]
+        }
+
+        AnswerChoice = self.migrate().get_model('polls', 'AnswerChoice')
+        stored = {}
+        for answer_id, choice_id in AnswerChoice.objects.values_list('answer_id', 'choice_id'):
+            stored.setdefault(answer_id, set()).add(choice_id)
+        self.assertEqual(stored, {
+            answers['single']: {yes.id},
+            answers['multiple']: {first.id, second.id},
+            answers['partly matched']: {first.id},
+        })
+
+
+class BackfillTalliesTest(MigrationTestCase):
+    migrate_from = [('polls', '0010_answer_archive')]
+    migrate_to = [('polls', '0011_backfill_tallies')]
+
+    def test_counters_include_earlier_answers(self):
+        Poll = self.apps.get_model('polls', 'Poll')
+        Question = self.apps.get_model('polls', 'Question')
+        Choice = self.apps.get_model('polls', 'Choice')
+        PollAnswer = self.apps.get_model('polls', 'PollAnswer')
+        Answer = self.apps.get_model('polls', 'Answer')
+        AnswerChoice = self.apps.get_model('polls', 'AnswerChoice')
+        QuestionTally = self.apps.get_model('polls', 'QuestionTally')
+        ChoiceTally = self.apps.get_model('polls', 'ChoiceTally')
+        poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        question = Question.objects.create(poll=poll, text='Choice', question_type='choice')
+        unanswered = Question.objects.create(poll=poll, text='Other', question_type='text')
+        yes = Choice.objects.create(question=question, text='Yes')
+        no = Choice.objects.create(question=question, text='No')
+        for user_id, choice in enumerate([yes, yes, no]):
+            poll_answer = PollAnswer.objects.create(poll=poll, user_id=user_id)
+            answer = Answer.objects.create(
+                poll_answer=poll_answer, question=question, user_id=user_id, answer=choice.text
+            )
+            AnswerChoice.objects.create(answer=answer, choice=choice)
+        # Only the latest answer was counted, the counters of archived
+        # answers stay higher.
+        QuestionTally.objects.create(question=question, responses=1)
+        ChoiceTally.objects.create(choice=no, votes=5)
+
+        apps = self.migrate()
+        QuestionTally = apps.get_model('polls', 'QuestionTally')
+        ChoiceTally = apps.get_model('polls', 'ChoiceTally')
+        self.assertEqual(
+            dict(QuestionTally.objects.values_list('question_id', 'responses')), {question.id: 3}
+        )
+        self.assertEqual(
+            dict(ChoiceTally.objects.values_list('choice_id', 'votes')), {yes.id: 2, no.id: 5}
+        )
+        self.assertFalse(QuestionTally.objects.filter(question_id=unanswered.id).exists())
@@ -1,8 +1,10 @@
 from datetime import datetime
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
-from polls.models import Poll, Question
+from polls.models import Poll, Question, Choice
 
 
 class PollTest(TestCase):
@@ -26,6 +28,43 @@ class PollTest(TestCase):
         poll.date_start = date
         self.assertRaises(ValidationError, poll.save)
 
+    def test_poll_loaded_without_date_start_saves(self):
+        poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=datetime.now().date(),
+            date_finish=datetime.now().date()
+        )
+        only = Poll.objects.only('name').get(pk=poll.pk)
+        only.name = 'Renamed'
+        only.save()
+        deferred = Poll.objects.defer('date_start').get(pk=poll.pk)
+        deferred.description = 'Changed'
+        deferred.save()
+        poll.refresh_from_db()
+        self.assertEqual((poll.name, poll.description), ('Renamed', 'Changed'))
+
+        deferred = Poll.objects.defer('date_start').get(pk=poll.pk)
+        deferred.date_start = datetime.strptime('2020-01-01', '%Y-%m-%d').date()
+        self.assertRaises(ValidationError, deferred.save)
+
+    def test_loaded_poll_saves_changed_fields_only(self):
+        Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=datetime.now().date(),
+            date_finish=datetime.now().date()
+        )
+        poll = Poll.objects.get()
+        with self.assertNumQueries(0):
+            poll.save()
+        poll.name = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            poll.save()
+        update = queries[0]['sql']
+        self.assertTrue(update.startswith('UPDATE "polls_poll" SET "name" = '))
+        self.assertNotIn('description', update)
+        self.assertFalse(any(query['sql'].startswith('SELECT') for query in queries))
+        self.assertEqual(Poll.objects.get().name, 'Renamed')
+
 
 class QuestionTest(TestCase):
     def setUp(self):
@@ -50,3 +89,22 @@ class QuestionTest(TestCase):
         self.assertEqual(Question.objects.get(id=1).question_type, 'text')
         self.assertEqual(Question.objects.get(id=2).question_type, 'choice')
         self.assertEqual(Question.objects.get(id=3).question_type, 'multiple choice')
+
+
+class ChoiceTest(TestCase):
+    def test_choice_saves_changed_fields_only(self):
+        poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=datetime.now().date(),
+            date_finish=datetime.now().date()
+        )
+        question = Question.objects.create(
+            poll=poll, text='Test question', question_type='choice'
+        )
+        choice = Choice.objects.create(question=question, text='Yes')
+        choice.text = 'No'
+        with CaptureQueriesContext(connection) as queries:
+            choice.save()
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE "polls_choice" SET "text" = '))
+        self.assertNotIn('question_id', queries[0]['sql'])
+        self.assertEqual(Choice.objects.get().text, 'No')
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from polls import readpath
+from polls.models import Poll, Question, Choice, Answer, PollAnswer
+from polls.serializers import ActivePollSerializer, PollDoneSerializer
+
+TODAY = datetime.now().date()
+
+
+class ValuesReadPathTest(TestCase):
+    def setUp(self):
+        for i in range(3):
+            poll = Poll.objects.create(
+                name=f'Poll "{i}"', description='Описание опроса',
+                date_start=TODAY, date_finish=TODAY + timedelta(days=i)
+            )
+            for question_type in ('text', 'choice', 'multiple choice'):
+                question = Question.objects.create(
+                    poll=poll, text=f'{question_type} question', question_type=question_type
+                )
+                if question_type != 'text':
+                    Choice.objects.create(question=question, text='Yes')
+                    Choice.objects.create(question=question, text='No')
+            if i < 2:
+                poll_answer = PollAnswer.objects.create(poll=poll, user_id=1)
+                for question in poll.questions.order_by('-id'):
+                    Answer.objects.create(
+                        poll_answer=poll_answer, question=question,
+                        user_id=1, answer='Yes'
+                    )
+        Poll.objects.create(
+            name='Empty', description='', date_start=TODAY, date_finish=TODAY
+        )
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_active_polls_output_matches_serializer(self):
+        polls = Poll.objects.order_by('id')
+        self.assertEqual(
+            self.render(readpath.active_polls(polls)),
+            self.render(ActivePollSerializer(polls, many=True).data)
+        )
+
+    def test_done_polls_output_matches_serializer(self):
+        poll_answers = PollAnswer.objects.filter(user_id=1).order_by('id')
+        self.assertEqual(
+            self.render(readpath.done_polls(
+                list(poll_answers.values(*readpath.DONE_POLL_FIELDS))
+            )),
+            self.render(PollDoneSerializer(poll_answers, many=True).data)
+        )
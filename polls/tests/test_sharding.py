@@ -0,0 +1,240 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls import archive, ingest, sharding
+from polls.api_views import PollDoneListView
+from polls.cache import completed_polls
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import Poll, Question, Choice, Answer, AnswerChoice, \
+    AnswerArchive, PollAnswer, QuestionTally, ChoiceTally
+
+TODAY = datetime.now().date()
+SHARDS = ['answers_a', 'answers_b', 'answers_c']
+
+
+@override_settings(ANSWER_DATABASES=SHARDS)
+class AnswerShardingTest(APITestCase):
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        for alias in SHARDS:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(cls.directory.name, f'{alias}.sqlite3'),
+            }
+        with override_settings(ANSWER_DATABASES=SHARDS):
+            for alias in SHARDS:
+                call_command('migrate', 'polls', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', 'myemail@test.com', '123')
+        self.polls = []
+        for i in range(6):
+            poll = Poll.objects.create(
+                name=f'Poll {i}', description='Text of description',
+                date_start=TODAY, date_finish=TODAY
+            )
+            question = Question.objects.create(
+                poll=poll, text=f'Question {i}', question_type='choice'
+            )
+            Choice.objects.create(question=question, text='Yes')
+            Choice.objects.create(question=question, text='No')
+            self.polls.append(poll)
+
+    def submit(self, poll, user_id):
+        question = poll.questions.get()
+        choice = question.choices.get(text='Yes')
+        return Submission(poll.id, user_id, [SubmittedAnswer(question.id, 'Yes', [choice.id])])
+
+    def stored(self, model, **lookup):
+        return {
+            alias: model.objects.using(alias).filter(**lookup).count()
+            for alias in ['default'] + SHARDS
+        }
+
+    def test_placement_is_stable_and_spread(self):
+        placement = {pk: sharding.database_for_poll(pk) for pk in range(1, 61)}
+        self.assertEqual(placement, {pk: sharding.database_for_poll(pk) for pk in range(1, 61)})
+        self.assertEqual(set(placement.values()), set(SHARDS))
+        for pk, alias in placement.items():
+            # A new database only takes polls over, they never move between
+            # the existing ones.
+            self.assertIn(
+                sharding.database_for_poll(pk, SHARDS + ['answers_d']), {alias, 'answers_d'}
+            )
+
+    def test_answers_are_stored_on_poll_database(self):
+        poll = self.polls[0]
+        question = poll.questions.get()
+        self.client.force_authenticate(user=self.user)
+        url = reverse('answers-create')
+        data = {'poll': poll.id, 'answers': [{'question': question.id, 'answer': 'Yes'}]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        alias = sharding.database_for_poll(poll.id)
+        for model in (PollAnswer, Answer, AnswerChoice):
+            expected = {name: 0 for name in ['default'] + SHARDS}
+            expected[alias] = 1
+            self.assertEqual(self.stored(model), expected)
+        self.assertEqual(QuestionTally.objects.get(question=question).responses, 1)
+
+    def test_done_polls_are_merged_across_databases(self):
+        ingest.write([self.submit(poll, self.user.id) for poll in self.polls])
+        ingest.write([self.submit(poll, self.user.id + 1) for poll in self.polls[:3]])
+        self.assertGreater(len(sharding.group_by_database(self.polls, lambda poll: poll.id)), 1)
+        self.client.force_authenticate(user=self.user)
+
+        results = []
+        response = self.client.get(reverse('polls-done'), {'page_size': 4}, format='json')
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results.extend(response.json()['results'])
+            if response.json()['next'] is None:
+                break
+            response = self.client.get(response.json()['next'], format='json')
+        self.assertEqual([result['poll']['id'] for result in results], [poll.id for poll in self.polls])
+        self.assertEqual(results[0]['answers'], [{
+            'question': {
+                'id': self.polls[0].questions.get().id,
+                'question_type': 'choice',
+                'text': 'Question 0'
+            },
+            'answer': 'Yes'
+        }])
+
+        with mock.patch.object(PollDoneListView, 'values_read_path', False):
+            response = self.client.get(reverse('polls-done'), {'page_size': 10}, format='json')
+        self.assertEqual(response.json()['results'], results)
+
+    def test_unanswered_active_polls_use_cached_poll_ids(self):
+        completed_polls.clear()
+        self.addCleanup(completed_polls.clear)
+        ingest.write([self.submit(self.polls[0], self.user.id)])
+        self.client.force_authenticate(user=self.user)
+        url = reverse('polls-active')
+
+        response = self.client.get(url, {'unanswered': 1}, format='json')
+        self.assertEqual(
+            [poll['id'] for poll in response.json()], [poll.id for poll in self.polls[1:]]
+        )
+        self.assertEqual(completed_polls.get(self.user.id), {self.polls[0].id})
+
+        question = self.polls[1].questions.get()
+        data = {'poll': self.polls[1].id, 'answers': [{'question': question.id, 'answer': 'No'}]}
+        response = self.client.post(reverse('answers-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(completed_polls.get(self.user.id), {self.polls[0].id, self.polls[1].id})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'unanswered': 1}, format='json')
+        self.assertEqual(
+            [poll['id'] for poll in response.json()], [poll.id for poll in self.polls[2:]]
+        )
+
+    def test_rebalance_moves_answers_to_poll_database(self):
+        with override_settings(ANSWER_DATABASES=['default']):
+            ingest.write([self.submit(poll, user_id) for poll in self.polls for user_id in (1, 2)])
+        self.assertEqual(self.stored(PollAnswer)['default'], 12)
+
+        out = StringIO()
+        call_command('rebalance_answers', dry_run=True, stdout=out)
+        self.assertIn('Would move 12 submissions.', out.getvalue())
+        self.assertEqual(self.stored(PollAnswer)['default'], 12)
+
+        call_command('rebalance_answers', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.stored(PollAnswer)['default'], 0)
+        for poll in self.polls:
+            alias = sharding.database_for_poll(poll.id)
+            self.assertEqual(self.stored(PollAnswer, poll_id=poll.id)[alias], 2)
+            self.assertEqual(
+                self.stored(AnswerChoice, answer__poll_answer__poll_id=poll.id)[alias], 2
+            )
+
+        call_command('rebuild_tallies', stdout=StringIO())
+        for poll in self.polls:
+            question = poll.questions.get()
+            self.assertEqual(QuestionTally.objects.get(question=question).responses, 2)
+            self.assertEqual(
+                ChoiceTally.objects.get(choice=question.choices.get(text='Yes')).votes, 2
+            )
+
+    def test_archives_move_with_their_poll(self):
+        poll = self.polls[0]
+        Poll.objects.filter(pk=poll.pk).update(date_finish=TODAY - timedelta(days=1))
+        with override_settings(ANSWER_DATABASES=['default']):
+            ingest.write([self.submit(poll, self.user.id)])
+            self.assertEqual(archive.archive_poll(poll.id), 1)
+        call_command('rebalance_answers', stdout=StringIO())
+
+        alias = sharding.database_for_poll(poll.id)
+        self.assertEqual(self.stored(AnswerArchive), {
+            name: int(name == alias) for name in ['default'] + SHARDS
+        })
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('polls-done'), format='json')
+        self.assertEqual(response.json()['results'][0]['answers'][0]['answer'], 'Yes')
+        poll.delete()
+        self.assertEqual(sum(self.stored(AnswerArchive).values()), 0)
+
+    def test_admin_reads_answers_from_poll_database(self):
+        poll = self.polls[0]
+        ingest.write([self.submit(poll, self.user.id)])
+        admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:polls_poll_change', args=[poll.id]))
+        poll_answer = PollAnswer.objects.using(sharding.database_for_poll(poll.id)).get()
+        link = reverse('admin:polls_answer_changelist') + \
+            f'?poll_answer__poll__id__exact={poll.id}&amp;poll_answer__id__exact={poll_answer.id}'
+        self.assertContains(response, link)
+
+        response = self.client.get(reverse('admin:polls_answer_changelist'), {
+            'poll_answer__poll__id__exact': poll.id, 'poll_answer__id__exact': poll_answer.id
+        })
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, 'Question 0')
+        response = self.client.get(
+            reverse('admin:polls_pollanswer_changelist'), {'poll__id__exact': poll.id}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, 'Poll 0')
+
+        # The answers of all polls are nowhere together.
+        response = self.client.get(reverse('admin:polls_answer_changelist'), follow=True)
+        self.assertEqual(response.redirect_chain, [(reverse('admin:polls_poll_changelist'), 302)])
+        self.assertContains(response, 'Answers are stored with their poll')
+        self.assertContains(
+            response, reverse('admin:polls_pollanswer_changelist') + f'?poll__id__exact={poll.id}'
+        )
+
+    def test_deleting_poll_deletes_its_answers(self):
+        poll = self.polls[0]
+        ingest.write([self.submit(poll, self.user.id)])
+        alias = sharding.database_for_poll(poll.id)
+        self.assertEqual(self.stored(Answer)[alias], 1)
+        poll.delete()
+        for model in (PollAnswer, Answer, AnswerChoice):
+            self.assertEqual(sum(self.stored(model).values()), 0)
@@ -0,0 +1,72 @@
+import os
+from io import StringIO
+import tempfile
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls import ingest
+from polls.models import Poll, Question, Choice, Answer, PollAnswer, ChoiceTally
+from polls.spool import get_spool
+
+TODAY = datetime.now().date()
+
+
+class AnswerSpoolTest(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            ANSWER_SPOOL_ENABLED=1,
+            ANSWER_SPOOL_PATH=os.path.join(directory.name, 'spool.sqlite3')
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.question = Question.objects.create(
+            poll=self.poll, text='Test question', question_type='choice'
+        )
+        self.choice = Choice.objects.create(question=self.question, text='Yes')
+        self.user = User.objects.create_user('user', 'myemail@test.com', '123')
+        self.data = {
+            'poll': self.poll.id,
+            'answers': [{'question': self.question.id, 'answer': 'Yes'}]
+        }
+
+    def test_submission_is_spooled_and_drained(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('answers-create')
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(get_spool()), 1)
+        self.assertEqual(PollAnswer.objects.count(), 0)
+
+        call_command('drain_answers', stdout=StringIO())
+        self.assertEqual(len(get_spool()), 0)
+        self.assertEqual(Answer.objects.get().answer, 'Yes')
+        self.assertEqual(ChoiceTally.objects.get(choice=self.choice).votes, 1)
+
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_drain_skips_written_entries(self):
+        submission = ingest.Submission(self.poll.id, self.user.id, [
+            ingest.SubmittedAnswer(self.question.id, 'Yes', [self.choice.id])
+        ])
+        get_spool().append(submission)
+        # Rows committed by a drain that died before clearing the spool.
+        ingest.write([submission])
+        call_command('drain_answers', stdout=StringIO())
+        self.assertEqual(len(get_spool()), 0)
+        self.assertEqual(PollAnswer.objects.count(), 1)
+        self.assertEqual(ChoiceTally.objects.get(choice=self.choice).votes, 1)
@@ -0,0 +1,41 @@
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from polls.models import Poll, Question, Choice, Answer, AnswerChoice, \
+    PollAnswer, QuestionTally, ChoiceTally
+
+
+class RebuildTalliesTest(TestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=datetime.now().date(),
+            date_finish=datetime.now().date()
+        )
+        self.question = Question.objects.create(
+            poll=self.poll, text='Test question', question_type='multiple choice'
+        )
+        self.first = Choice.objects.create(question=self.question, text='First')
+        self.second = Choice.objects.create(question=self.question, text='Second')
+        selections = [
+            (1, 'First', [self.first]),
+            (2, 'First;Second', [self.first, self.second]),
+            (3, 'Other', []),
+        ]
+        for user_id, text, choices in selections:
+            poll_answer = PollAnswer.objects.create(poll=self.poll, user_id=user_id)
+            answer = Answer.objects.create(
+                poll_answer=poll_answer, question=self.question,
+                user_id=user_id, answer=text
+            )
+            for choice in choices:
+                AnswerChoice.objects.create(answer=answer, choice=choice)
+
+    def test_rebuild_tallies(self):
+        ChoiceTally.objects.create(choice=self.second, votes=100)
+        call_command('rebuild_tallies', poll=[self.poll.id], stdout=StringIO())
+        self.assertEqual(QuestionTally.objects.get(question=self.question).responses, 3)
+        self.assertEqual(ChoiceTally.objects.get(choice=self.first).votes, 2)
+        self.assertEqual(ChoiceTally.objects.get(choice=self.second).votes, 1)
@@ -0,0 +1,122 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls import ingest, timeline
+from polls.cache import poll_timelines
+from polls.ingest import Submission, SubmittedAnswer
+from polls.models import Poll, Question, PollAnswer
+from polls.spool import get_spool
+
+TODAY = datetime.now().date()
+NOW = datetime(2026, 10, 18, 12, 30, 15, tzinfo=timezone.utc)
+
+
+class RingCounterTest(APITestCase):
+    def test_keeps_latest_buckets(self):
+        counter = timeline.RingCounter(3, 10)
+        counter.add(9)
+        counter.add(10)
+        counter.add(10)
+        counter.add(12)
+        self.assertEqual([counter.get(index) for index in range(9, 13)], [0, 2, 0, 1])
+        counter.add(13)
+        self.assertEqual(counter.oldest(13), 11)
+        self.assertEqual(counter.get(10), 0)
+        self.assertEqual(counter.get(13), 1)
+        counter.add(10)
+        self.assertEqual(counter.get(13), 1)
+
+
+@override_settings(TIMELINE_BUFFER_SIZE=10)
+@mock.patch('polls.timeline.timezone.now', return_value=NOW)
+class TimelineTest(APITestCase):
+    def setUp(self):
+        poll_timelines.clear()
+        self.addCleanup(poll_timelines.clear)
+        self.poll = Poll.objects.create(
+            name='Test', description='Text of description',
+            date_start=TODAY, date_finish=TODAY
+        )
+        self.question = Question.objects.create(
+            poll=self.poll, text='Text', question_type='text'
+        )
+        self.submit(1, NOW - timedelta(minutes=1))
+        self.submit(2, NOW - timedelta(minutes=1, seconds=10))
+        self.submit(3, NOW - timedelta(minutes=30))
+        self.admin = User.objects.create_superuser('admin', 'myemail@test.com', '123')
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('polls-timeline', kwargs={'pk': self.poll.id})
+
+    def submit(self, user_id, created_at):
+        ingest.write([Submission(
+            self.poll.id, user_id, [SubmittedAnswer(self.question.id, 'Text', [])], created_at
+        )])
+
+    def counts(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['count'] for item in response.json()['series']]
+
+    def test_minutes_from_buffer(self, now):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'bucket': 'minute', 'limit': 3}, format='json')
+        self.assertEqual(self.counts(response), [0, 2, 0])
+        self.assertEqual(response.json()['series'][0]['start'], '2026-10-18T12:28:00Z')
+
+        self.submit(4, NOW)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'bucket': 'minute', 'limit': 3}, format='json')
+        self.assertEqual(self.counts(response), [0, 2, 1])
+
+    def test_drained_answers_count_when_accepted(self, now):
+        response = self.client.get(self.url, {'bucket': 'minute', 'limit': 3}, format='json')
+        self.assertEqual(self.counts(response), [0, 2, 0])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(ANSWER_SPOOL_PATH=os.path.join(directory.name, 'spool.sqlite3')):
+            with mock.patch('polls.spool.timezone.now', return_value=NOW - timedelta(minutes=2)):
+                get_spool().append(Submission(
+                    self.poll.id, 4, [SubmittedAnswer(self.question.id, 'Text', [])]
+                ))
+            call_command('drain_answers', stdout=StringIO())
+        self.assertEqual(
+            PollAnswer.objects.get(user_id=4).created_at, NOW - timedelta(minutes=2)
+        )
+        response = self.client.get(self.url, {'bucket': 'minute', 'limit': 3}, format='json')
+        self.assertEqual(self.counts(response), [1, 2, 0])
+
+    def test_history_beyond_buffer(self, now):
+        response = self.client.get(self.url, {'bucket': 'minute', 'limit': 40}, format='json')
+        counts = self.counts(response)
+        self.assertEqual(len(counts), 40)
+        self.assertEqual(counts[9], 1)
+        self.assertEqual(counts[-2], 2)
+        self.assertEqual(sum(counts), 3)
+
+        # The buffer is loaded, older buckets take one more query.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'bucket': 'minute', 'limit': 40}, format='json')
+        self.assertEqual(self.counts(response), counts)
+
+        response = self.client.get(self.url, {'bucket': 'hour', 'limit': 1}, format='json')
+        self.assertEqual(self.counts(response), [3])
+
+    def test_undated_answers_are_left_out(self, now):
+        PollAnswer.objects.create(poll=self.poll, user_id=5, created_at=None)
+        response = self.client.get(self.url, {'bucket': 'day'}, format='json')
+        self.assertEqual(len(self.counts(response)), 60)
+        self.assertEqual(self.counts(response)[-1], 3)
+
+    def test_invalid_params(self, now):
+        response = self.client.get(self.url, {'bucket': 'week'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'limit': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
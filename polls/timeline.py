@@ -0,0 +1,118 @@
+"""Submissions of a poll per minute, hour or day.
+
+The latest buckets of a poll are kept in per-process ring buffers. A buffer
+is loaded from the database when first read, then counted up by every
+submission written through this process, and loaded again once it expires,
+which bounds how long submissions of other processes go unseen. Buckets older
+than the buffer are counted with one grouped query.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .cache import poll_timelines
+from .models import PollAnswer
+from . import sharding
+
+BUCKETS = {'minute': 60, 'hour': 60 * 60, 'day': 24 * 60 * 60}
+# Buckets are counted from the epoch in UTC, whatever TIME_ZONE is.
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bucket_index(moment, bucket):
+    return int((moment - EPOCH).total_seconds()) // BUCKETS[bucket]
+
+
+def bucket_start(index, bucket):
+    return EPOCH + timedelta(seconds=index * BUCKETS[bucket])
+
+
+class RingCounter:
+    """Counts of the latest ``size`` buckets, from bucket ``first`` on."""
+
+    def __init__(self, size, first):
+        self.size = size
+        self.first = first
+        self._lock = threading.Lock()
+        self._indexes = [None] * size
+        self._counts = [0] * size
+
+    def oldest(self, current):
+        """Oldest bucket counted while ``current`` is the latest one."""
+        return max(self.first, current - self.size + 1)
+
+    def add(self, index, amount=1):
+        if index < self.first:
+            return
+        slot = index % self.size
+        with self._lock:
+            stored = self._indexes[slot]
+            if stored != index:
+                if stored is not None and stored > index:
+                    # Older than the buffer.
+                    return
+                self._indexes[slot] = index
+                self._counts[slot] = 0
+            self._counts[slot] += amount
+
+    def get(self, index):
+        slot = index % self.size
+        with self._lock:
+            return self._counts[slot] if self._indexes[slot] == index else 0
+
+
+def count(poll_id, bucket, start, end):
+    """Submissions of the poll per bucket index in [start, end)."""
+    rows = PollAnswer.objects.using(sharding.database_for_poll(poll_id)).filter(
+        poll_id=poll_id,
+        created_at__gte=bucket_start(start, bucket),
+        created_at__lt=bucket_start(end, bucket),
+    ).annotate(
+        bucket=Trunc('created_at', bucket, tzinfo=timezone.utc)
+    ).values_list('bucket').annotate(count=Count('id')).order_by()
+    return {bucket_index(moment, bucket): amount for moment, amount in rows}
+
+
+def series(poll_id, bucket, limit):
+    """(bucket start, submissions) of the latest ``limit`` buckets, oldest first."""
+    current = bucket_index(timezone.now(), bucket)
+    first = current - limit + 1
+    counter = poll_timelines.get((poll_id, bucket))
+    if counter is None:
+        # One query loads the buffer together with the history before it.
+        size = settings.TIMELINE_BUFFER_SIZE
+        counter = RingCounter(size, current - size + 1)
+        counts = count(poll_id, bucket, min(first, counter.first), current + 1)
+        for index, amount in counts.items():
+            counter.add(index, amount)
+        poll_timelines.set((poll_id, bucket), counter)
+    elif first < counter.oldest(current):
+        counts = count(poll_id, bucket, first, counter.oldest(current))
+    else:
+        counts = {}
+    oldest = counter.oldest(current)
+    for index in range(max(first, oldest), current + 1):
+        counts[index] = counter.get(index)
+    return [
+        (bucket_start(index, bucket), counts.get(index, 0))
+        for index in range(first, current + 1)
+    ]
+
+
+def record(poll_answers):
+    """Count stored submissions in the buffers of their polls, if loaded."""
+    by_poll = {}
+    for poll_answer in poll_answers:
+        by_poll.setdefault(poll_answer.poll_id, []).append(poll_answer.created_at)
+    for poll_id, moments in by_poll.items():
+        for bucket in BUCKETS:
+            counter = poll_timelines.get((poll_id, bucket))
+            if counter is None:
+                continue
+            for moment in moments:
+                if moment is not None:
+                    counter.add(bucket_index(moment, bucket))
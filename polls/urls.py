@@ -5,14 +5,22 @@ from polls import api_views
 
 urlpatterns = [
     path('polls/', api_views.PollListView.as_view(), name='polls-list'),
+    path('polls/bulk/', api_views.PollBulkCreateView.as_view(), name='polls-bulk'),
     path('polls/<int:pk>/', api_views.PollDetailView.as_view(), name='polls-detail'),
+    path('polls/<int:pk>/results/', api_views.PollResultsView.as_view(), name='polls-results'),
+    path('polls/<int:pk>/crosstab', api_views.PollCrosstabView.as_view(), name='polls-crosstab'),
+    path('polls/<int:pk>/timeline', api_views.PollTimelineView.as_view(), name='polls-timeline'),
+    path('polls/<int:pk>/export', api_views.PollExportView.as_view(), name='polls-export'),
     path('polls/active/', api_views.ActivePollListView.as_view(), name='polls-active'),
     path('polls/done/', api_views.PollDoneListView.as_view(), name='polls-done'),
     path('questions/', api_views.QuestionListView.as_view(), name='questions-list'),
     path('questions/<int:pk>/', api_views.QuestionDetailView.as_view(), name='questions-detail'),
+    path('questions/<int:pk>/choices/', api_views.QuestionChoicesView.as_view(), name='questions-choices'),
     path('choices/', api_views.ChoiceListView.as_view(), name='choices-list'),
     path('choices/<int:pk>/', api_views.ChoiceDetailView.as_view(), name='choices-detail'),
     path('answer/', api_views.AnswerCreateView.as_view(), name='answers-create'),
+    path('token/', api_views.TokenObtainView.as_view(), name='token-obtain'),
+    path('metrics', api_views.MetricsView.as_view(), name='metrics'),
     path('', include('rest_framework.urls', namespace='api')),
     path('openapi', get_schema_view(
             title="Polls app",